@@ -0,0 +1,193 @@
+"""Headless batch projections for a book of client plans.
+
+    python batch_runner.py plans.csv summary.parquet --ledgers ledgers/
+
+Reads plans from a CSV or Parquet file in chunks, projects each chunk in a
+worker process and streams one summary row per plan to Parquet, so memory
+is bounded by the chunk size rather than the file size.
+"""
+import argparse
+import calendar
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from wealth_engine import project_plan_batch
+
+DEFAULT_CHUNK_SIZE = 5_000
+REQUIRED_COLUMNS = ("contribution", "years", "return_pct")
+OPTIONAL_COLUMNS = {
+    "inflation_pct": 0.0,
+    "fee_pct": 0.0,
+    "step_up_pct": 0.0,
+    "lump_sum": 0.0,
+    "anchor_month": "January",
+    "annuity_due": True,
+}
+SUMMARY_COLUMNS = ["plan_id", "final_nominal", "final_real", "total_contrib", "gain_nominal", "gain_real"]
+_MONTH_INDEX = {name.lower(): i for names in (calendar.month_name, calendar.month_abbr)
+                for i, name in enumerate(names[1:])}
+_FLAG_VALUES = {"true": True, "yes": True, "1": True, "false": False, "no": False, "0": False}
+
+
+# ── Reading plans ─────────────────────────────────────────────────────────────
+def read_plan_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Yield the plans in ``path`` (.csv or .parquet) as DataFrames of at most ``chunk_size`` rows."""
+    if path.lower().endswith(".parquet"):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def _anchor_index(value) -> int:
+    if isinstance(value, str) and not value.strip().isdigit():
+        try:
+            return _MONTH_INDEX[value.strip().lower()]
+        except KeyError:
+            raise ValueError(f"Unknown anchor month {value!r}.") from None
+    month = int(value)
+    if not 1 <= month <= 12:
+        raise ValueError(f"Anchor month {month} is not between 1 and 12.")
+    return month - 1
+
+
+def _annuity_due_flag(value) -> bool:
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.number)) and value in (0, 1):
+        return bool(value)
+    try:
+        return _FLAG_VALUES[str(value).strip().lower()]
+    except KeyError:
+        raise ValueError(f"Unknown annuity_due flag {value!r}; use true/false, yes/no or 1/0.") from None
+
+
+def normalize_plans(plans: pd.DataFrame, first_row: int = 0) -> pd.DataFrame:
+    """Validate a chunk of plans and fill the optional columns with their defaults.
+
+    ``anchor_month`` may be a month name or a number from 1 to 12, and
+    ``annuity_due`` true/false, yes/no or 1/0 in any case. Plans
+    without a ``plan_id`` are numbered by row, counting from ``first_row``.
+    """
+    missing = [c for c in REQUIRED_COLUMNS if c not in plans.columns]
+    if missing:
+        raise ValueError(f"Plans file is missing required columns: {', '.join(missing)}.")
+    plans = plans.copy()
+    for column, default in OPTIONAL_COLUMNS.items():
+        if column not in plans.columns:
+            plans[column] = default
+        else:
+            plans[column] = plans[column].fillna(default)
+    if "plan_id" not in plans.columns:
+        plans.insert(0, "plan_id", np.arange(first_row, first_row + len(plans)))
+    plans["years"] = plans["years"].astype(int)
+    if (plans["years"] < 1).any():
+        raise ValueError("Every plan needs a duration of at least one year.")
+    plans["anchor_index"] = plans["anchor_month"].map(_anchor_index)
+    plans["annuity_due"] = plans["annuity_due"].map(_annuity_due_flag).astype(bool)
+    return plans
+
+
+# ── Projecting ────────────────────────────────────────────────────────────────
+def project_chunk(chunk_index: int, plans: pd.DataFrame, start: str, ledger_dir=None) -> pd.DataFrame:
+    """Summary rows for one normalized chunk, writing its monthly ledger part when ``ledger_dir`` is set.
+
+    Plans are grouped by duration so each group is a single
+    ``project_plan_batch`` call.
+    """
+    summary = {k: np.empty(len(plans)) for k in SUMMARY_COLUMNS[1:]}
+    ledgers = []
+    for years, rows in plans.groupby("years", sort=False).indices.items():
+        group = plans.iloc[rows]
+        batch = project_plan_batch(
+            start, int(years), group["contribution"].values, group["return_pct"].values,
+            group["inflation_pct"].values, group["fee_pct"].values, group["step_up_pct"].values,
+            group["lump_sum"].values, group["anchor_index"].values, group["annuity_due"].values,
+        )
+        for column, values in summary.items():
+            values[rows] = batch[column]
+        if ledger_dir is not None:
+            months = len(batch["dates"])
+            ledgers.append(pd.DataFrame({
+                "plan_id": np.repeat(group["plan_id"].values, months),
+                "date": np.tile(batch["dates"].values, len(group)),
+                "contribution": batch["contribution"].ravel(),
+                "nominal_balance": batch["nominal"].ravel(),
+                "real_balance": batch["real"].ravel(),
+            }))
+    if ledgers:
+        pd.concat(ledgers, ignore_index=True).to_parquet(
+            os.path.join(ledger_dir, f"part-{chunk_index:05d}.parquet"), index=False)
+    return pd.DataFrame({"plan_id": plans["plan_id"].values, **summary})
+
+
+def run_batch(input_path: str, output_path: str, ledger_dir=None, workers=None,
+              chunk_size: int = DEFAULT_CHUNK_SIZE, start=None) -> dict:
+    """Project every plan in ``input_path`` and write the summary Parquet to ``output_path``.
+
+    Chunks are read lazily and at most two per worker are in flight, so a
+    100k-plan file never sits in memory at once. Summary rows are written in
+    input order. Returns the plan count, elapsed seconds and plans/sec.
+    """
+    start = start or datetime.today().strftime('%Y-%m-01')
+    workers = workers or os.cpu_count() or 1
+    if ledger_dir is not None:
+        os.makedirs(ledger_dir, exist_ok=True)
+    began = time.perf_counter()
+    n_plans = 0
+    writer = None
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = deque()
+
+            def write_oldest():
+                nonlocal writer
+                table = pa.Table.from_pandas(in_flight.popleft().result(), preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table)
+
+            for chunk_index, chunk in enumerate(read_plan_chunks(input_path, chunk_size)):
+                plans = normalize_plans(chunk, first_row=n_plans)
+                n_plans += len(plans)
+                in_flight.append(pool.submit(project_chunk, chunk_index, plans, start, ledger_dir))
+                if len(in_flight) >= 2 * workers:
+                    write_oldest()
+            while in_flight:
+                write_oldest()
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        pd.DataFrame(columns=SUMMARY_COLUMNS).to_parquet(output_path, index=False)
+    elapsed = time.perf_counter() - began
+    return {"plans": n_plans, "seconds": elapsed, "plans_per_sec": n_plans / elapsed if elapsed > 0 else float("inf")}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Project a book of client plans without the Streamlit UI.")
+    parser.add_argument("plans", help="CSV or Parquet file with one plan per row")
+    parser.add_argument("summary", help="Parquet file to write one summary row per plan to")
+    parser.add_argument("--ledgers", metavar="DIR", help="also write per-month ledgers as Parquet parts in DIR")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="plans per chunk")
+    parser.add_argument("--start", help="first month of every plan, YYYY-MM-01 (default: this month)")
+    args = parser.parse_args(argv)
+    try:
+        stats = run_batch(args.plans, args.summary, args.ledgers, args.workers, args.chunk_size, args.start)
+    except ValueError as e:
+        parser.exit(1, f"error: {e}\n")
+    print(f"Projected {stats['plans']:,} plans in {stats['seconds']:.2f} s "
+          f"({stats['plans_per_sec']:,.0f} plans/sec) -> {args.summary}")
+
+
+if __name__ == "__main__":
+    main()
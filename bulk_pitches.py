@@ -0,0 +1,307 @@
+"""Bulk investment pitches for a whole client list.
+
+    python bulk_pitches.py clients.csv pitches.jsonl --concurrency 8 --rpm 60
+    python bulk_pitches.py clients.csv pitches.jsonl --fake --fake-error-rate 0.2
+
+Clients are plan rows as read by ``batch_runner``. Each plan is projected,
+rendered with the same prompt as the pitch button and sent to the model by
+a bounded pool of asyncio workers behind a token-bucket rate limiter.
+Pitches are appended to a JSONL file as they complete, one line per client,
+and every finished client is recorded in a checkpoint file, so a rerun after
+a crash picks up where the last one stopped. Failures go to a separate
+errors file that each run starts afresh.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime
+
+from batch_runner import DEFAULT_CHUNK_SIZE, normalize_plans, project_chunk, read_plan_chunks
+from pitch_ai import FakePitchClient, PitchAPIError, build_pitch_prompt, default_pitch_client
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_REQUESTS_PER_MINUTE = 60
+DEFAULT_MAX_ATTEMPTS = 6
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 60.0
+
+
+# ── Flow control ──────────────────────────────────────────────────────────────
+class TokenBucket:
+    """Allows ``rate`` acquisitions per second on average, in bursts of up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float, rng=random) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(max_delay, base_delay * 2**attempt)]."""
+    return rng.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class Checkpoint:
+    """Append-only record of finished client ids, one per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.done = {line.strip() for line in f if line.strip()}
+        self._file = open(path, "a", encoding="utf-8")
+
+    def mark(self, client_id) -> None:
+        self._file.write(f"{client_id}\n")
+        self._file.flush()
+        self.done.add(str(client_id))
+
+    def close(self) -> None:
+        self._file.close()
+
+
+# ── Pipeline ──────────────────────────────────────────────────────────────────
+def plan_prompts(path: str, start=None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Yield ``(client_id, prompt)`` for every plan in a CSV/Parquet plans file, one chunk at a time."""
+    start = start or datetime.today().strftime('%Y-%m-01')
+    first_row = 0
+    for chunk_index, chunk in enumerate(read_plan_chunks(path, chunk_size)):
+        plans = normalize_plans(chunk, first_row=first_row)
+        first_row += len(plans)
+        summary = project_chunk(chunk_index, plans, start)
+        client_ids = plans["plan_id"].tolist()
+        for client_id, plan, result in zip(client_ids, plans.itertuples(index=False), summary.itertuples(index=False)):
+            yield client_id, build_pitch_prompt(
+                plan.years, plan.contribution, plan.return_pct, plan.inflation_pct,
+                result.total_contrib, result.final_nominal, result.final_real,
+            )
+
+
+async def generate_pitches(jobs, client, output_path: str, checkpoint_path=None, errors_path=None,
+                           concurrency: int = DEFAULT_CONCURRENCY,
+                           requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+                           max_attempts: int = DEFAULT_MAX_ATTEMPTS, base_delay: float = DEFAULT_BASE_DELAY,
+                           max_delay: float = DEFAULT_MAX_DELAY, rng=random) -> dict:
+    """Generate a pitch for each ``(client_id, prompt)`` in ``jobs`` and append them to ``output_path``.
+
+    ``concurrency`` workers share one token bucket, so requests never
+    exceed ``requests_per_minute`` (every attempt counts). A
+    ``PitchAPIError`` (429/5xx) is retried up to ``max_attempts`` times
+    with full-jitter exponential backoff, or after the server's
+    ``retry_after`` hint when it gives one. Any other error, or running
+    out of attempts, writes an error line to ``errors_path`` (default
+    ``<output>.errors``, truncated at the start of each run) and leaves the
+    client out of the checkpoint so a rerun tries it again; the output
+    therefore only ever holds one pitch per client. Clients already in the
+    checkpoint (default ``<output>.checkpoint``) are skipped. Jobs are
+    pulled lazily through a bounded queue.
+    """
+    if max_attempts < 1:
+        raise ValueError(f"max_attempts must be at least 1, got {max_attempts}.")
+    checkpoint = Checkpoint(checkpoint_path or output_path + ".checkpoint")
+    bucket = TokenBucket(requests_per_minute / 60.0, capacity=max(1.0, min(concurrency, requests_per_minute / 60.0)))
+    queue = asyncio.Queue(maxsize=2 * concurrency)
+    stats = {"done": 0, "failed": 0, "skipped": 0, "retries": 0}
+    began = time.perf_counter()
+
+    with open(output_path, "a", encoding="utf-8") as out, \
+            open(errors_path or output_path + ".errors", "w", encoding="utf-8") as errors:
+        async def worker():
+            while True:
+                job = await queue.get()
+                if job is None:
+                    return
+                client_id, prompt = job
+                record = {"client_id": client_id, "model": client.model_name}
+                started = time.perf_counter()
+                for attempt in range(max_attempts):
+                    await bucket.acquire()
+                    try:
+                        record["pitch"] = await client.generate(prompt)
+                        break
+                    except PitchAPIError as e:
+                        record["error"] = str(e)
+                        if attempt == max_attempts - 1:
+                            break
+                        stats["retries"] += 1
+                        delay = e.retry_after if e.retry_after is not None else backoff_delay(
+                            attempt, base_delay, max_delay, rng)
+                        await asyncio.sleep(delay)
+                    except Exception as e:
+                        record["error"] = f"{type(e).__name__}: {e}"
+                        break
+                if "pitch" in record:
+                    record.pop("error", None)
+                record.update(attempts=attempt + 1, latency_s=round(time.perf_counter() - started, 3))
+                sink = out if "pitch" in record else errors
+                sink.write(json.dumps(record) + "\n")
+                sink.flush()
+                if "pitch" in record:
+                    checkpoint.mark(client_id)
+                    stats["done"] += 1
+                else:
+                    stats["failed"] += 1
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            for client_id, prompt in jobs:
+                if str(client_id) in checkpoint.done:
+                    stats["skipped"] += 1
+                    continue
+                await queue.put((client_id, prompt))
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+            checkpoint.close()
+    stats["seconds"] = time.perf_counter() - began
+    return stats
+
+
+# ── Fake model server ─────────────────────────────────────────────────────────
+class FakeModelServer:
+    """Local HTTP stand-in for the model API that injects latency and errors.
+
+    ``POST /generate`` with ``{"prompt": ...}`` answers ``{"text": ...}``
+    after a random delay in ``latency``. With probability ``error_rate`` it
+    answers 429 (with a ``Retry-After`` of ``retry_after`` seconds) or 503
+    instead. Use as ``async with FakeModelServer() as server:`` and point
+    an ``HttpPitchClient`` at ``server.url``.
+    """
+
+    def __init__(self, latency=(0.05, 0.3), error_rate: float = 0.1, retry_after: float = 0.2, seed=None,
+                 text: str = FakePitchClient.TEXT):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.text = text
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._server = None
+        self.url = None
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        self.url = f"http://{host}:{port}/generate"
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            headers = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").lower()
+            length = int(headers.split("content-length:")[1].split("\r\n")[0]) if "content-length:" in headers else 0
+            json.loads(await reader.readexactly(length) or b"{}")
+            self.requests += 1
+            await asyncio.sleep(self._rng.uniform(*self.latency))
+            roll = self._rng.random()
+            if roll < self.error_rate / 2:
+                status, body, extra = 429, {"error": "quota exceeded"}, f"Retry-After: {self.retry_after}\r\n"
+            elif roll < self.error_rate:
+                status, body, extra = 503, {"error": "unavailable"}, ""
+            else:
+                status, body, extra = 200, {"text": self.text}, ""
+            payload = json.dumps(body).encode("utf-8")
+            writer.write(f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+                         f"{extra}Connection: close\r\n\r\n".encode("latin-1") + payload)
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+class HttpPitchClient:
+    """Async client for a ``FakeModelServer``-style JSON endpoint, one connection per request."""
+
+    def __init__(self, url: str, model_name: str = "fake-model-server"):
+        self.url = url
+        self.model_name = model_name
+        host_port, self._path = url.split("://", 1)[1].split("/", 1)
+        self._host, port = host_port.rsplit(":", 1)
+        self._port = int(port)
+
+    async def generate(self, prompt: str) -> str:
+        reader, writer = await asyncio.open_connection(self._host, self._port)
+        try:
+            payload = json.dumps({"prompt": prompt}).encode("utf-8")
+            writer.write(f"POST /{self._path} HTTP/1.1\r\nHost: {self._host}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode("latin-1") + payload)
+            await writer.drain()
+            head, _, body = (await reader.read()).partition(b"\r\n\r\n")
+        finally:
+            writer.close()
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split()[1])
+        headers = dict(line.lower().split(": ", 1) for line in lines[1:] if ": " in line)
+        if status == 429 or status >= 500:
+            retry_after = headers.get("retry-after")
+            raise PitchAPIError(status, body.decode("utf-8", "replace"),
+                                float(retry_after) if retry_after is not None else None)
+        if status != 200:
+            raise RuntimeError(f"HTTP {status}: {body.decode('utf-8', 'replace')}")
+        return json.loads(body)["text"]
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+async def _run(args) -> dict:
+    jobs = plan_prompts(args.clients, args.start, args.chunk_size)
+    options = dict(checkpoint_path=args.checkpoint, errors_path=args.errors, concurrency=args.concurrency, requests_per_minute=args.rpm,
+                   max_attempts=args.max_attempts)
+    if args.fake:
+        async with FakeModelServer((args.fake_latency / 2, args.fake_latency * 1.5), args.fake_error_rate) as server:
+            stats = await generate_pitches(jobs, HttpPitchClient(server.url), args.output, **options)
+            stats["server_requests"] = server.requests
+            return stats
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    client = default_pitch_client(os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY"))
+    return await generate_pitches(jobs, client, args.output, **options)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate investment pitches for every plan in a client list.")
+    parser.add_argument("clients", help="CSV or Parquet plans file (see batch_runner.py)")
+    parser.add_argument("output", help="JSONL file to append one pitch per client to")
+    parser.add_argument("--checkpoint", help="finished-client file (default: <output>.checkpoint)")
+    parser.add_argument("--errors", help="JSONL file for this run's failures (default: <output>.errors)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="requests in flight")
+    parser.add_argument("--rpm", type=float, default=DEFAULT_REQUESTS_PER_MINUTE, help="API quota in requests/minute")
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS, help="tries per client on 429/5xx")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="plans read per chunk")
+    parser.add_argument("--start", help="first month of every plan, YYYY-MM-01 (default: this month)")
+    parser.add_argument("--fake", action="store_true", help="run against a local fake model server")
+    parser.add_argument("--fake-latency", type=float, default=0.2, help="fake server mean latency in seconds")
+    parser.add_argument("--fake-error-rate", type=float, default=0.1, help="fake server share of 429/503 answers")
+    args = parser.parse_args(argv)
+    try:
+        stats = asyncio.run(_run(args))
+    except ValueError as e:
+        parser.exit(1, f"error: {e}\n")
+    print(f"{stats['done']:,} pitches, {stats['failed']:,} failed, {stats['skipped']:,} already done, "
+          f"{stats['retries']:,} retries in {stats['seconds']:.1f} s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
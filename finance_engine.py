@@ -0,0 +1,633 @@
+"""Vectorized calculation engine for the Smart Finance Calculator."""
+import time
+
+import numpy as np
+
+ZAKAT_RATE = 0.025
+
+
+# ── Investment scenario ───────────────────────────────────────────────────────
+MAX_SCENARIOS = 20
+
+
+def calculate_investment_scenarios(
+    investments, profit_rates, deduction_amts, months,
+    apply_zakat: bool, apply_tax: bool, income_tax_rate: float,
+) -> dict:
+    """Compound many investments monthly, with optional Zakat & income-tax deductions, in one pass.
+
+    ``investments``, ``profit_rates``, ``deduction_amts`` and ``months``
+    are per-scenario arrays; the deduction settings apply to all of them.
+    Each month's profit (less the deduction, floored at zero) is taxed and
+    reinvested; every twelfth month Zakat takes ``ZAKAT_RATE`` of that
+    year's profit. A deduction either matches or exceeds the first month's
+    profit, in which case the balance never moves, or it never binds,
+    because the balance only grows (Zakat takes part of a year's profit,
+    never more). In the second case a month maps its opening balance ``c``
+    to ``g*c - k`` and a Zakat year to ``A*c - B``. Both maps share the
+    fixed point ``c* = k/(g-1)``, the balance whose profit just covers the
+    deduction, so month ``m`` of year ``y`` opens at
+    ``c* + (c0 - c*) * A**y * g**m`` instead of running a loop.
+
+    Returns ``month`` (1 to the longest horizon), the per-month columns
+    ``monthly_profit``, ``tax``, ``zakat`` and ``total`` as
+    scenarios × months arrays (rounded to cents, NaN past each scenario's
+    horizon) and the unrounded per-scenario totals.
+    """
+    investments = np.asarray(investments, dtype=float).ravel()
+    rates = np.broadcast_to(np.asarray(profit_rates, dtype=float), investments.shape)
+    deductions = np.broadcast_to(np.asarray(deduction_amts, dtype=float), investments.shape)
+    horizons = np.broadcast_to(np.asarray(months, dtype=int), investments.shape).clip(min=0)
+    n_months = int(horizons.max(initial=0))
+    n_years = -(-n_months // 12)
+
+    tax_share = income_tax_rate / 100 if apply_tax else 0.0
+    zakat_share = ZAKAT_RATE if apply_zakat else 0.0
+    keep = 1 - tax_share
+    growth, drain = 1 + rates * keep, deductions * keep
+    # Powers of the excess over the fixed point, not differences of large sums, so long
+    # horizons cannot cancel catastrophically. With g == 1 nothing is drained (k == 0).
+    fixed = np.divide(drain, growth - 1, out=np.zeros(len(growth)), where=growth != 1)
+    month_pow = growth[:, None] ** np.arange(13)
+    year_growth = (1 - zakat_share) * month_pow[:, 12] + zakat_share
+    year_pow = year_growth[:, None] ** np.arange(n_years)
+    excess = investments - fixed
+    opening = fixed[:, None] + (excess[:, None, None] * year_pow[:, :, None]
+                                * month_pow[:, None, :12]).reshape(len(growth), n_years * 12)
+    bound = investments * rates <= deductions
+    opening[bound] = investments[bound, None]
+    gross = np.maximum(opening * rates[:, None] - deductions[:, None], 0.0)
+
+    live = np.arange(n_years * 12) < horizons[:, None]
+    tax = np.where(live, gross * tax_share, 0.0)
+    profit = np.where(live, gross, 0.0) - tax
+    zakat = np.zeros(profit.shape)
+    if apply_zakat:
+        annual = profit.reshape(len(profit), n_years, 12).sum(axis=2)
+        complete = 12 * np.arange(1, n_years + 1) <= horizons[:, None]
+        zakat[:, 11::12] = np.where(complete & (annual > 0), annual * ZAKAT_RATE, 0.0)
+    total = opening + profit - zakat
+
+    last = np.maximum(horizons - 1, 0)
+    current = np.where(horizons > 0, total[np.arange(len(total)), last] if n_months else 0.0, investments)
+    total_profit = profit.sum(axis=1)
+    past_horizon = ~live[:, :n_months]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(investments > 0, total_profit / investments * 100, 0.0)
+        avg_monthly = np.where(horizons > 0, total_profit / horizons, 0.0)
+    return {
+        "month": np.arange(1, n_months + 1),
+        **{key: np.where(past_horizon, np.nan, values[:, :n_months].round(2))
+           for key, values in (("monthly_profit", profit), ("tax", tax), ("zakat", zakat), ("total", total))},
+        "months": np.array(horizons),
+        "current": current,
+        "total_profit": total_profit,
+        "total_zakat": zakat.sum(axis=1),
+        "total_tax": tax.sum(axis=1),
+        "roi": roi,
+        "avg_monthly": avg_monthly,
+    }
+
+
+def calculate_investment_scenario(
+    investment: float, profit_rate: float, deduction_amt: float,
+    months: int, apply_zakat: bool, apply_tax: bool, income_tax_rate: float,
+) -> dict:
+    """One scenario of ``calculate_investment_scenarios``, with 1-D columns and scalar totals."""
+    batch = calculate_investment_scenarios([investment], profit_rate, deduction_amt, int(months),
+                                           apply_zakat, apply_tax, income_tax_rate)
+    result = {"month": batch["month"]}
+    for key in ("monthly_profit", "tax", "zakat", "total"):
+        result[key] = batch[key][0]
+    for key in ("current", "total_profit", "total_zakat", "total_tax", "roi", "avg_monthly"):
+        result[key] = float(batch[key][0])
+    return result
+
+
+# ── Rent projection ───────────────────────────────────────────────────────────
+def rent_projection(initial_rent: float, years: int, annual_increase: float, monthly_expense: float,
+                    vacancy_rate: float, tax_rate: float) -> dict:
+    """Year-by-year rental income after vacancy, expenses and tax, with rent rising ``annual_increase`` % a year.
+
+    Returns the per-year columns ``year``, ``monthly_rent``, ``gross``,
+    ``vacancy_loss``, ``expenses``, ``tax`` and ``net`` (rounded to whole
+    units) alongside the unrounded totals.
+    """
+    years = int(years)
+    rent = initial_rent * (1 + annual_increase / 100) ** np.arange(years)
+    gross = rent * 12
+    vacancy_loss = gross * (vacancy_rate / 100)
+    expenses = np.full(years, monthly_expense * 12.0)
+    tax = (gross - vacancy_loss) * (tax_rate / 100)
+    net = gross - vacancy_loss - expenses - tax
+    return {
+        "year": np.arange(1, years + 1),
+        "monthly_rent": rent.round(),
+        "gross": gross.round(),
+        "vacancy_loss": vacancy_loss.round(),
+        "expenses": expenses.round(),
+        "tax": tax.round(),
+        "net": net.round(),
+        "total_gross": float(gross.sum()),
+        "total_net": float(net.sum()),
+        "total_vacancy_loss": float(vacancy_loss.sum()),
+        "total_expenses": float(expenses.sum()),
+        "total_tax": float(tax.sum()),
+        "final_monthly_rent": initial_rent * (1 + annual_increase / 100) ** years,
+    }
+
+
+# ── Committee / BC ────────────────────────────────────────────────────────────
+def committee_cash_flow(members: int, contribution: float, draw_position: int) -> dict:
+    """Month-by-month position of one member of a ``members``-strong committee drawing at ``draw_position``.
+
+    Returns the columns ``month``, ``payment``, ``cumulative_paid``,
+    ``pot_received`` and ``net_position``, rounded to whole units.
+    """
+    month = np.arange(1, int(members) + 1)
+    pot = members * contribution
+    cumulative_paid = month * contribution
+    return {
+        "month": month,
+        "payment": np.full(len(month), float(round(contribution))),
+        "cumulative_paid": cumulative_paid.round(),
+        "pot_received": np.where(month == draw_position, pot, 0.0).round(),
+        "net_position": (np.where(month >= draw_position, pot, 0.0) - cumulative_paid).round(),
+    }
+
+
+def committee_positions(members: int, contribution: float, comparison_rates) -> dict:
+    """Every draw position of a committee against investing the same contribution, for each comparison rate.
+
+    Drawing at position ``D`` pays the pot (``members * contribution``) in
+    month ``D``, which then compounds for the remaining ``members - D``
+    months; the alternative invests ``contribution`` every month for
+    ``members`` months. ``comparison_rates`` are monthly rates. Returns
+    ``positions``, ``rates``, rates × positions arrays ``bc_fv`` and
+    ``advantage`` (committee minus investing), the per-rate ``invest_fv``,
+    ``break_even`` (the last position that still matches or beats
+    investing, 0 if none), ``win_share`` (the fraction of positions that
+    do) and ``expected_fv`` / ``expected_advantage`` under a uniformly
+    random draw, plus the per-position ``apparent_return`` (simple
+    annualised %).
+    """
+    members = int(members)
+    positions = np.arange(1, members + 1)
+    rates = np.atleast_1d(np.asarray(comparison_rates, dtype=float))
+    pot = members * contribution
+    with np.errstate(divide="ignore", invalid="ignore"):
+        invest_fv = np.where(rates > 0, contribution * ((1 + rates) ** members - 1) / rates, contribution * members)
+        apparent_return = np.where(contribution > 0, (pot / (positions * contribution) - 1) / (positions / 12) * 100, 0.0)
+    bc_fv = pot * (1 + rates[:, None]) ** (members - positions)
+    advantage = bc_fv - invest_fv[:, None]
+    # The later the draw, the fewer months the pot compounds, so winning positions form a prefix.
+    wins = advantage >= 0
+    return {
+        "positions": positions,
+        "rates": rates,
+        "bc_fv": bc_fv,
+        "invest_fv": invest_fv,
+        "advantage": advantage,
+        "apparent_return": apparent_return,
+        "break_even": wins.sum(axis=1),
+        "win_share": wins.mean(axis=1),
+        "expected_fv": bc_fv.mean(axis=1),
+        "expected_advantage": advantage.mean(axis=1),
+    }
+
+
+# ── Loan amortisation ─────────────────────────────────────────────────────────
+def amortization_schedule(principal: float, annual_rate_pct: float, years: int, extra_payment: float = 0.0) -> dict:
+    """Level-EMI amortisation schedule, with ``extra_payment`` of principal each month.
+
+    Until the loan is paid off every month pays ``emi + extra_payment``, so
+    the opening balances follow ``b*g - payment`` in closed form; the
+    final month pays only what is still owed, ``b*(1 + r)``. Returns the columns
+    ``month``, ``payment``, ``principal``, ``interest`` and ``balance``
+    (rounded to whole units) plus ``emi``, the unrounded ``payments``
+    for cash-flow maths, the standard schedule's ``total_interest_std``
+    and the actual ``total_interest``, ``total_paid`` and ``months``.
+    """
+    n = int(years) * 12
+    r = annual_rate_pct / 12 / 100
+    growth = 1 + r
+    if r > 0 and principal > 0:
+        emi = principal * r * growth ** n / (growth ** n - 1)
+    elif principal > 0:
+        emi = principal / n
+    else:
+        emi = 0.0
+
+    powers = growth ** np.arange(n)
+    opening = principal * powers - (emi + extra_payment) * (np.cumsum(powers) - powers)
+    interest = opening * r
+    scheduled = emi - interest
+    extra = np.minimum(extra_payment, np.maximum(0.0, opening - scheduled))
+    paid_off = np.flatnonzero(opening - scheduled <= extra_payment)
+    months = int(paid_off[0]) + 1 if len(paid_off) else n
+
+    interest, extra = interest[:months], extra[:months]
+    principal_paid = scheduled[:months] + extra
+    payment = emi + extra
+    if len(paid_off):
+        # The EMI alone can exceed what is left; the last payment clears the balance and no more.
+        principal_paid[-1] = opening[months - 1]
+        payment[-1] = opening[months - 1] + interest[-1]
+    balance = opening[:months] - principal_paid
+    if balance[-1] <= 0:
+        balance[-1] = 0.0
+    return {
+        "month": np.arange(1, months + 1),
+        "payment": payment.round(),
+        "principal": principal_paid.round(),
+        "interest": interest.round(),
+        "balance": np.maximum(balance, 0.0).round(),
+        "emi": emi,
+        "payments": payment,
+        "total_interest_std": emi * n - principal,
+        "total_interest": float(interest.sum()),
+        "total_paid": float(payment.sum()),
+        "months": months,
+    }
+
+
+# ── Internal rate of return ───────────────────────────────────────────────────
+def committee_cash_flows(members: int, contribution: float) -> np.ndarray:
+    """Monthly cash flows of every draw position: row ``D - 1`` pays ``contribution`` each month and receives the pot in month ``D``."""
+    members = int(members)
+    flows = np.full((members, members), -float(contribution))
+    flows[np.arange(members), np.arange(members)] += members * contribution
+    return flows
+
+
+def loan_cash_flows(principal: float, payments, fees: float = 0.0) -> np.ndarray:
+    """Borrower's cash flows: the principal net of upfront ``fees`` at month 0, then each payment out."""
+    payments = np.asarray(payments, dtype=float)
+    received = np.broadcast_to(np.asarray(principal - fees, dtype=float)[..., None], payments.shape[:-1] + (1,))
+    return np.concatenate((received, -payments), axis=-1)
+
+
+def _npv_and_slope(cash_flows, times, rate):
+    # NPV rescaled by a positive factor so no discount factor exceeds 1: the sign and
+    # the root are unchanged, and nothing overflows near rate = -1.
+    log_growth = np.log1p(rate)[:, None]
+    shift = np.where(log_growth < 0, times.max(axis=-1, keepdims=True), 0.0)
+    weighted = cash_flows * np.exp(-(times - shift) * log_growth)
+    return weighted.sum(axis=1), -(weighted * times).sum(axis=1) / (1 + rate)
+
+
+def _periodic_npv_and_slope(flows_by_period, rows, rate):
+    # Same rescaling for flows at whole periods, by Horner's rule down the period axis
+    # (``flows_by_period`` is periods × rows): the NPV as a polynomial in 1/(1+r) for
+    # r >= 0, the future value as a polynomial in 1+r below that.
+    value, slope = np.empty(len(rows)), np.empty(len(rows))
+    n_rows = flows_by_period.shape[1]
+    for growing in (True, False):
+        part = np.flatnonzero((rate >= 0) == growing)
+        if not len(part):
+            continue
+        z = 1 / (1 + rate[part]) if growing else 1 + rate[part]
+        columns = rows[part]
+        if 4 * len(columns) >= n_rows:
+            # Running Horner over every row is cheaper than gathering most of them.
+            flows, picked = flows_by_period, columns
+            z_all = np.ones(n_rows)
+            z_all[columns] = z
+        else:
+            flows, picked, z_all = flows_by_period[:, columns], slice(None), z
+        if growing:
+            flows = flows[::-1]
+        v, s = np.zeros(len(z_all)), np.zeros(len(z_all))
+        for c in flows:
+            s *= z_all
+            s += v
+            v *= z_all
+            v += c
+        value[part] = v[picked]
+        slope[part] = s[picked] * (-z * z) if growing else s[picked]
+    return value, slope
+
+
+_BRACKET_GRID = np.array([-0.99, -0.5, -0.2, -0.1, -0.05, -0.02, -0.01, 0.0, 0.005, 0.01, 0.02, 0.05,
+                          0.1, 0.2, 0.5, 1.0, 3.0, 10.0, 100.0])
+
+
+def _solve_rates(evaluate, n: int, guess: float, tol: float, max_iter: int) -> np.ndarray:
+    """Safeguarded Newton for the rate zeroing each of ``n`` rows, vectorized over rows.
+
+    ``evaluate(rows, rates)`` returns a positively rescaled NPV of those
+    rows and its slope. Each row is bracketed between -99% and +100%, the
+    upper end widened tenfold, at most four times (to 1,000,000%), while
+    the NPV has the same sign at both ends. Rows
+    that still do not bracket (e.g. two sign changes) are scanned on a
+    grid of rates for the root nearest ``guess``; rows with none get NaN.
+    A Newton step that leaves the bracket, or has no slope, is
+    replaced by bisection.
+    """
+    everything = np.arange(n)
+    lo, hi = np.full(n, -0.99), np.full(n, 1.0)
+    f_lo, f_hi = evaluate(everything, lo)[0], evaluate(everything, hi)[0]
+    for _ in range(4):
+        unbracketed = np.flatnonzero(np.sign(f_lo) == np.sign(f_hi))
+        if not len(unbracketed):
+            break
+        hi[unbracketed] *= 10
+        f_hi[unbracketed] = evaluate(unbracketed, hi[unbracketed])[0]
+
+    unbracketed = np.flatnonzero((np.sign(f_lo) == np.sign(f_hi)) & (f_lo != 0))
+    if len(unbracketed):
+        grid = np.broadcast_to(_BRACKET_GRID, (len(unbracketed), len(_BRACKET_GRID)))
+        # Each grid point is rescaled differently, but only signs are compared.
+        values = np.stack([evaluate(unbracketed, grid[:, j])[0] for j in range(grid.shape[1])], axis=1)
+        signs = np.sign(values)
+        changes = ((signs[:, :-1] != signs[:, 1:]) & (signs[:, :-1] != 0)) | (signs[:, :-1] == 0)
+        gap = np.maximum(grid[:, :-1] - guess, 0) + np.maximum(guess - grid[:, 1:], 0)
+        distance = np.where(changes, gap, np.inf)
+        pick = distance.argmin(axis=1)
+        rows = np.arange(len(unbracketed))
+        found = np.isfinite(distance[rows, pick])
+        lo[unbracketed] = np.where(found, grid[rows, pick], np.nan)
+        hi[unbracketed] = np.where(found, grid[rows, pick + 1], np.nan)
+        f_lo[unbracketed] = np.where(found, values[rows, pick], np.nan)
+        f_hi[unbracketed] = np.where(found, values[rows, pick + 1], np.nan)
+
+    rates = np.full(n, np.nan)
+    rates[f_lo == 0] = lo[f_lo == 0]
+    active = np.flatnonzero((f_lo != 0) & (f_lo * f_hi <= 0))
+    lo, hi, f_lo = lo[active], hi[active], f_lo[active]
+    rates[active] = np.clip(guess, lo, hi)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for _ in range(max_iter):
+            if not len(active):
+                break
+            x = rates[active]
+            f, slope = evaluate(active, x)
+            below = np.sign(f) == np.sign(f_lo)
+            lo, f_lo, hi = np.where(below, x, lo), np.where(below, f, f_lo), np.where(below, hi, x)
+            step = x - f / slope
+            step = np.where(~np.isfinite(step) | (step < lo) | (step > hi), (lo + hi) / 2, step)
+            step = np.where(f == 0, x, step)
+            rates[active] = step
+            done = (np.abs(step - x) <= tol * (1 + np.abs(x))) | (f == 0)
+            active, lo, hi, f_lo = active[~done], lo[~done], hi[~done], f_lo[~done]
+    return rates
+
+
+def irr(cash_flows, guess: float = 0.01, tol: float = 1e-10, max_iter: int = 100):
+    """Periodic internal rate of return of each row of ``cash_flows`` (flow ``t`` at period ``t``).
+
+    Rows may be NaN-padded to a common length; a row whose NPV never
+    changes sign gets NaN, and one with several roots (more than one sign
+    change in its flows) gets the root nearest ``guess``. A 1-D series
+    returns a float.
+    """
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    flows_by_period = np.ascontiguousarray(np.nan_to_num(np.atleast_2d(cash_flows)).T)
+    rates = _solve_rates(lambda rows, rate: _periodic_npv_and_slope(flows_by_period, rows, rate),
+                         flows_by_period.shape[1], guess, tol, max_iter)
+    return float(rates[0]) if cash_flows.ndim == 1 else rates
+
+
+def xirr(cash_flows, dates, guess: float = 0.1, tol: float = 1e-10, max_iter: int = 100):
+    """Annual internal rate of return for flows on arbitrary ``dates`` (actual/365, as spreadsheet XIRR).
+
+    ``dates`` is one date per column, shared by every row, or one per flow.
+    """
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    flows = np.nan_to_num(np.atleast_2d(cash_flows))
+    days = np.asarray(dates, dtype="datetime64[D]").astype(float)
+    times = np.broadcast_to((days - days[..., :1]) / 365, flows.shape)
+    rates = _solve_rates(lambda rows, rate: _npv_and_slope(flows[rows], times[rows], rate),
+                         len(flows), guess, tol, max_iter)
+    return float(rates[0]) if cash_flows.ndim == 1 else rates
+
+
+def effective_annual_rate(periodic_rate, periods_per_year: int = 12):
+    """Compound a periodic rate up to an effective annual rate."""
+    return (1 + np.asarray(periodic_rate)) ** periods_per_year - 1
+
+
+# ── Benchmark ─────────────────────────────────────────────────────────────────
+def _calculate_investment_scenario_reference(
+    investment, profit_rate, deduction_amt, months, apply_zakat, apply_tax, income_tax_rate,
+):
+    """Original per-month loop, kept as the baseline for the benchmark."""
+    rows = []
+    current = investment
+    total_profit = 0.0
+    total_zakat = 0.0
+    total_tax_ded = 0.0
+    annual_profit = 0.0
+
+    for m in range(1, int(months) + 1):
+        mp = current * profit_rate
+        mp = max(0.0, mp - deduction_amt) if mp >= deduction_amt else 0.0
+
+        tax_m = 0.0
+        if apply_tax and mp > 0:
+            tax_m = mp * (income_tax_rate / 100)
+            mp -= tax_m
+
+        current += mp
+        annual_profit += mp
+        total_profit += mp
+        total_tax_ded += tax_m
+
+        zakat_m = 0.0
+        if apply_zakat and m % 12 == 0 and annual_profit > 0:
+            zakat_m = annual_profit * 0.025
+            current = max(0.0, current - zakat_m)
+            total_zakat += zakat_m
+            annual_profit = 0.0
+
+        rows.append({
+            "Month": m,
+            "Monthly Profit": round(mp, 2),
+            "Tax Deducted": round(tax_m, 2),
+            "Zakat Deducted": round(zakat_m, 2),
+            "Total Amount": round(current, 2),
+        })
+
+    roi = (total_profit / investment * 100) if investment > 0 else 0.0
+    avg_monthly = total_profit / months if months > 0 else 0.0
+    return {
+        "rows": rows, "current": current, "total_profit": total_profit,
+        "total_zakat": total_zakat, "total_tax": total_tax_ded,
+        "roi": roi, "avg_monthly": avg_monthly,
+    }
+
+
+_REFERENCE_COLUMNS = {"month": "Month", "monthly_profit": "Monthly Profit", "tax": "Tax Deducted",
+                      "zakat": "Zakat Deducted", "total": "Total Amount"}
+
+
+def check_investment_scenario(*args) -> None:
+    """Assert the engine matches the original loop, to the cent per row and to 1e-9 in the totals."""
+    expected = _calculate_investment_scenario_reference(*args)
+    actual = calculate_investment_scenario(*args)
+    for key, column in _REFERENCE_COLUMNS.items():
+        np.testing.assert_allclose(actual[key], [row[column] for row in expected["rows"]],
+                                   rtol=1e-9, atol=0.011, err_msg=column)
+    for key in ("current", "total_profit", "total_zakat", "total_tax", "roi", "avg_monthly"):
+        np.testing.assert_allclose(actual[key], expected[key], rtol=1e-9, atol=1e-6, err_msg=key)
+
+
+def _amortization_schedule_reference(principal, annual_rate_pct, years, extra_payment=0.0):
+    """Original amortisation loop, kept as the baseline for ``check_amortization_schedule``."""
+    loan_n = years * 12
+    loan_r = annual_rate_pct / 12 / 100
+    if loan_r > 0 and principal > 0:
+        emi = principal * loan_r * (1 + loan_r) ** loan_n / ((1 + loan_r) ** loan_n - 1)
+    elif principal > 0:
+        emi = principal / loan_n
+    else:
+        emi = 0.0
+
+    balance = principal
+    rows = []
+    total_interest = 0.0
+    actual_months = loan_n
+    for m in range(1, loan_n + 1):
+        interest_pmt = balance * loan_r
+        principal_pmt = emi - interest_pmt
+        extra_this_mo = min(extra_payment, max(0.0, balance - principal_pmt))
+        total_monthly = emi + extra_this_mo
+        principal_pmt += extra_this_mo
+        balance -= principal_pmt
+        if balance <= 0:
+            balance = 0.0
+            total_monthly = interest_pmt + (principal_pmt + balance)
+            actual_months = m
+        total_interest += interest_pmt
+        rows.append((m, round(total_monthly, 0), round(principal_pmt, 0), round(interest_pmt, 0),
+                     round(max(balance, 0.0), 0)))
+        if balance <= 0:
+            break
+    return rows, total_interest, actual_months
+
+
+def check_amortization_schedule(*args) -> None:
+    """Assert the amortisation schedule matches the original loop row for row."""
+    rows, total_interest, months = _amortization_schedule_reference(*args)
+    actual = amortization_schedule(*args)
+    if months == actual["months"] + 1 and rows[-2][4] == 0:
+        # The loop can leave a sub-cent crumb and charge a whole extra EMI for it.
+        rows, months = rows[:-1], months - 1
+    assert actual["months"] == months, (actual["months"], months)
+    expected = np.array(rows, dtype=float).reshape(-1, 5)
+    if len(expected):
+        # The loop charged the full EMI in the payoff month even when less was owed.
+        owed = expected[-2, 4] if len(expected) > 1 else args[0]
+        expected[-1, 2] = min(expected[-1, 2], owed)
+        expected[-1, 1] = min(expected[-1, 1], owed + expected[-1, 3])
+    for i, key in enumerate(("month", "payment", "principal", "interest", "balance")):
+        np.testing.assert_allclose(actual[key], expected[:, i], rtol=1e-9, atol=1.0, err_msg=key)
+    np.testing.assert_allclose(actual["total_interest"], total_interest, rtol=1e-9, atol=1e-6)
+
+
+def benchmark_investment_scenario(months: int = 120, repeats: int = 200) -> dict:
+    """Time the engine against the original loop after checking they agree."""
+    for args in [
+        (1_000_000, 0.03, 0.0, months, True, True, 15.0),
+        (1_000_000, 0.03, 5_000.0, months, True, False, 0.0),
+        (500_000, 0.01, 2_000.0, months, False, True, 30.0),
+        (100_000, 0.02, 5_000.0, months, True, True, 15.0),     # deduction binds from month one
+        (100_000, 0.0, 0.0, months, True, True, 15.0),
+        (2_500_000, 0.015, 37_500.0, months, True, True, 100.0),
+        (1_000_000, 0.03, 30_000.0, months, True, True, 15.0),  # deduction equals the first month's profit
+        (1_000_000, 0.05, 50_000.0, months, True, False, 0.0),
+        (100_000, 0.10, 10_000.0, months, False, True, 15.0),
+        (1_000_000, 0.03, 29_000.0, months, True, True, 15.0),  # just below it: slow growth, then compounding
+    ]:
+        check_investment_scenario(*args)
+
+    args = (1_000_000, 0.01, 2_000.0, months, True, True, 15.0)
+    timings = {}
+    for name, fn in [("loop", _calculate_investment_scenario_reference), ("vectorized", calculate_investment_scenario)]:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn(*args)
+        timings[name] = (time.perf_counter() - start) / repeats
+    return {
+        "months": months,
+        "loop_ms": timings["loop"] * 1e3,
+        "vectorized_ms": timings["vectorized"] * 1e3,
+        "speedup": timings["loop"] / timings["vectorized"],
+    }
+
+
+def benchmark_scenario_batch(n_scenarios: int = MAX_SCENARIOS, months: int = 1200, repeats: int = 50) -> dict:
+    """Time one batched call for ``n_scenarios`` against as many single-scenario calls."""
+    rng = np.random.default_rng(0)
+    investments = rng.uniform(100_000, 5_000_000, n_scenarios)
+    rates = rng.uniform(0.005, 0.04, n_scenarios)
+    deductions = rng.choice([0.0, 2_000.0], n_scenarios)
+    horizons = rng.integers(12, months + 1, n_scenarios)
+    horizons[0] = months
+    deductions[1], horizons[1] = investments[1] * rates[1], months   # deduction equals the first month's profit
+    batch = calculate_investment_scenarios(investments, rates, deductions, horizons, True, True, 15.0)
+    for i in range(n_scenarios):
+        single = calculate_investment_scenario(investments[i], rates[i], deductions[i], horizons[i], True, True, 15.0)
+        np.testing.assert_allclose(batch["total"][i, :horizons[i]], single["total"])
+        check_investment_scenario(investments[i], rates[i], deductions[i], horizons[i], True, True, 15.0)
+        assert np.isnan(batch["total"][i, horizons[i]:]).all()
+
+    timings = {}
+    for name, run in [
+        ("batched", lambda: calculate_investment_scenarios(investments, rates, deductions, horizons, True, True, 15.0)),
+        ("one_by_one", lambda: [calculate_investment_scenario(*args, True, True, 15.0)
+                                for args in zip(investments, rates, deductions, horizons)]),
+    ]:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            run()
+        timings[name] = (time.perf_counter() - start) / repeats
+    return {"scenarios": n_scenarios, "months": months,
+            "batched_ms": timings["batched"] * 1e3, "one_by_one_ms": timings["one_by_one"] * 1e3}
+
+
+def benchmark_irr(n_loans: int = 10_000, months: int = 360, max_members: int = 100) -> dict:
+    """Solve ``n_loans`` random fee-bearing loan offers and every BC draw position up to ``max_members``."""
+    rng = np.random.default_rng(0)
+    principal = rng.uniform(100_000, 10_000_000, n_loans)
+    monthly_rate = rng.uniform(0.01, 0.40, n_loans) / 12
+    growth = (1 + monthly_rate) ** months
+    emi = principal * monthly_rate * growth / (growth - 1)
+    payments = np.repeat(emi[:, None], months, axis=1)
+    np.testing.assert_allclose(irr(loan_cash_flows(principal, payments)), monthly_rate, rtol=1e-8)
+    flows = loan_cash_flows(principal, payments, principal * rng.uniform(0.0, 0.05, n_loans))
+    start = time.perf_counter()
+    loan_rates = irr(flows)
+    loan_s = time.perf_counter() - start
+    assert (loan_rates >= monthly_rate).all()
+    for args in [(5_000_000, 18.0, 30, 50_000.0), (500_000, 12.0, 5, 7_000.0), (10_000, 18.0, 1, 0.0)]:
+        # Prepaying principal without fees leaves the true rate at the quoted one.
+        schedule = amortization_schedule(*args)
+        apr = irr(loan_cash_flows(args[0], schedule["payments"])) * 12 * 100
+        np.testing.assert_allclose(apr, args[1], rtol=1e-9, err_msg=str(args))
+
+    committees = np.concatenate([
+        np.pad(committee_cash_flows(m, 10_000.0), ((0, 0), (0, max_members - m)), constant_values=np.nan)
+        for m in range(2, max_members + 1)
+    ])
+    start = time.perf_counter()
+    bc_rates = irr(committees, guess=0.0)
+    bc_s = time.perf_counter() - start
+    np.testing.assert_allclose(bc_rates, 0.0, atol=1e-9)
+    return {"loans": n_loans, "months": months, "loan_ms": loan_s * 1e3,
+            "positions": len(committees), "bc_ms": bc_s * 1e3}
+
+
+if __name__ == "__main__":
+    for args in [(5_000_000, 18.0, 5), (5_000_000, 18.0, 30, 50_000.0), (500_000, 0.0, 10, 7_000.0), (0.0, 12.0, 1)]:
+        check_amortization_schedule(*args)
+    for n in (12, 120, 480, 1200):
+        r = benchmark_investment_scenario(n)
+        print(f"{r['months']:>4} months: loop {r['loop_ms']:.3f} ms  |  "
+              f"vectorized {r['vectorized_ms']:.3f} ms  |  {r['speedup']:.1f}x")
+    r = benchmark_scenario_batch()
+    print(f"{r['scenarios']} scenarios x {r['months']} months: batched {r['batched_ms']:.2f} ms  |  "
+          f"one by one {r['one_by_one_ms']:.2f} ms")
+    r = benchmark_irr()
+    print(f"IRR: {r['loans']:,} loans x {r['months']} months {r['loan_ms']:.0f} ms  |  "
+          f"{r['positions']:,} BC positions {r['bc_ms']:.0f} ms")
@@ -1,9 +1,16 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import urllib.parse
 from datetime import datetime
 
+from finance_engine import (
+    MAX_SCENARIOS, amortization_schedule, calculate_investment_scenario, calculate_investment_scenarios,
+    committee_cash_flow, committee_cash_flows, committee_positions, effective_annual_rate, irr, loan_cash_flows,
+    rent_projection,
+)
+
 # ── Page config ──────────────────────────────────────────────────────────────
 st.set_page_config(
     page_title="Smart Finance Calculator",
@@ -146,54 +153,59 @@ def parse_investment(inv_type_en: str, inv_type_ur: str, language: str) -> float
     return st.number_input(lbl, min_value=0.0, value=default, step=step) * mult
 
 
-def calculate_investment_scenario(
-    investment: float, profit_rate: float, deduction_amt: float,
-    months: int, apply_zakat: bool, apply_tax: bool, income_tax_rate: float,
-) -> dict:
-    """Run the compound investment loop with optional Zakat & income-tax deductions."""
-    rows = []
-    current = investment
-    total_profit = 0.0
-    total_zakat = 0.0
-    total_tax_ded = 0.0
-    annual_profit = 0.0
-
-    for m in range(1, int(months) + 1):
-        mp = current * profit_rate
-        mp = max(0.0, mp - deduction_amt) if mp >= deduction_amt else 0.0
-
-        tax_m = 0.0
-        if apply_tax and mp > 0:
-            tax_m = mp * (income_tax_rate / 100)
-            mp -= tax_m
-
-        current += mp
-        annual_profit += mp
-        total_profit += mp
-        total_tax_ded += tax_m
-
-        zakat_m = 0.0
-        if apply_zakat and m % 12 == 0 and annual_profit > 0:
-            zakat_m = annual_profit * 0.025
-            current = max(0.0, current - zakat_m)
-            total_zakat += zakat_m
-            annual_profit = 0.0
-
-        rows.append({
-            "Month": m,
-            "Monthly Profit": round(mp, 2),
-            "Tax Deducted": round(tax_m, 2),
-            "Zakat Deducted": round(zakat_m, 2),
-            "Total Amount": round(current, 2),
-        })
-
-    roi = (total_profit / investment * 100) if investment > 0 else 0.0
-    avg_monthly = total_profit / months if months > 0 else 0.0
-    return {
-        "rows": rows, "current": current, "total_profit": total_profit,
-        "total_zakat": total_zakat, "total_tax": total_tax_ded,
-        "roi": roi, "avg_monthly": avg_monthly,
-    }
+# Per-row columns of each calculator: engine key → (English, Urdu) header.
+INVESTMENT_COLUMNS = {
+    "month":          ("Month",          "مہینہ"),
+    "monthly_profit": ("Monthly Profit", "ماہانہ منافع"),
+    "tax":            ("Tax Deducted",   "ٹیکس کٹوتی"),
+    "zakat":          ("Zakat Deducted", "زکوٰۃ کٹوتی"),
+    "total":          ("Total Amount",   "کل رقم"),
+}
+RENT_COLUMNS = {
+    "year":         ("Year",         "سال"),
+    "monthly_rent": ("Monthly Rent", "ماہانہ کرایہ"),
+    "gross":        ("Gross Annual", "مجموعی سالانہ"),
+    "vacancy_loss": ("Vacancy Loss", "خالی نقصان"),
+    "expenses":     ("Expenses",     "اخراجات"),
+    "tax":          ("Tax",          "ٹیکس"),
+    "net":          ("Net Income",   "خالص آمدنی"),
+}
+BC_COLUMNS = {
+    "month":           ("Month",           "مہینہ"),
+    "payment":         ("Your Payment",    "آپ کی ادائیگی"),
+    "cumulative_paid": ("Cumulative Paid", "کل ادا کردہ"),
+    "pot_received":    ("Pot Received",    "پاٹ موصول"),
+    "net_position":    ("Net Position",    "خالص پوزیشن"),
+}
+LOAN_COLUMNS = {
+    "month":     ("Month",     "مہینہ"),
+    "payment":   ("EMI",       "قسط"),
+    "principal": ("Principal", "اصل رقم"),
+    "interest":  ("Interest",  "سود"),
+    "balance":   ("Balance",   "باقی رقم"),
+}
+
+# Monthly comparison rates (%) on the committee tab's draw-position heatmap.
+BC_RATE_GRID_PCT = np.arange(0.0, 5.01, 0.25)
+
+
+def result_frame(res: dict, columns: dict) -> pd.DataFrame:
+    """The calculator's per-row columns as one DataFrame keyed by engine name, shared by chart, table and CSV."""
+    return pd.DataFrame({key: res[key] for key in columns})
+
+
+def display_table(frame: pd.DataFrame, columns: dict, english: bool, hide=()) -> pd.DataFrame:
+    """Breakdown table for ``st.dataframe``: amounts as "USD 1,234" under headers in the chosen language."""
+    keys = [k for k in frame.columns if k not in hide]
+    return pd.DataFrame({
+        columns[k][0 if english else 1]: frame[k] if i == 0 else frame[k].map("USD {:,.0f}".format)
+        for i, k in enumerate(keys)
+    })
+
+
+def csv_export(frame: pd.DataFrame, columns: dict, english: bool) -> str:
+    """``frame`` as CSV with headers in the chosen language."""
+    return frame.to_csv(index=False, header=[columns[k][0 if english else 1] for k in frame.columns])
 
 
 _SEP = "━" * 24
@@ -251,7 +263,7 @@ with tab1:
 
     # ── Enhancement 2: Compare toggle ────────────────────────────────────────
     compare_mode = st.checkbox(
-        "🔀  Compare Two Scenarios" if EN else "🔀  دو منظرنامے موازنہ کریں",
+        "🔀  Compare Scenarios" if EN else "🔀  منظرنامے موازنہ کریں",
         key="compare_mode",
     )
 
@@ -288,166 +300,135 @@ with tab1:
             f'<p class="section-label">{"Scenario Inputs" if EN else "منظرنامے کے ان پٹ"}</p>',
             unsafe_allow_html=True,
         )
-        sc_a_col, sc_b_col = st.columns(2)
-
-        # ── Scenario A inputs ─────────────────────────────────────────────────
-        with sc_a_col:
-            st.markdown("#### 📊 " + ("Scenario A" if EN else "منظرنامہ الف"))
-            if EN:
-                a_itype = st.selectbox("Investment type:", ["Millions", "Lacs", "Custom Amount"], key="a_itype")
-                if a_itype == "Millions":
-                    inv_a = st.number_input("Amount (millions):", min_value=0.0, value=1.0, step=0.5, key="a_iamt") * 1_000_000
-                elif a_itype == "Lacs":
-                    inv_a = st.number_input("Amount (lacs):", min_value=0.0, value=5.0, step=1.0, key="a_iamt") * 100_000
-                else:
-                    inv_a = st.number_input("Amount (USD):", min_value=0.0, value=100_000.0, step=10_000.0, key="a_iamt")
-                rate_a = st.number_input("Monthly profit rate (%):", min_value=0.0, value=3.0, step=0.1, key="a_rate") / 100
-                ded_a  = st.number_input("Monthly deduction (USD):", min_value=0.0, step=500.0, key="a_ded")
-                meth_a = st.radio("Method:", ["Months", "Quarters"], horizontal=True, key="a_meth")
-                mo_a   = int(st.number_input("Months:" if meth_a == "Months" else "Quarters:", min_value=1, value=12, step=1, key="a_mo"))
-                if meth_a == "Quarters":
-                    mo_a *= 3
-            else:
-                a_itype = st.selectbox("سرمایہ کاری کی قسم:", ["ملین", "لاکھ", "کسٹم رقم"], key="a_itype")
-                if a_itype == "ملین":
-                    inv_a = st.number_input("رقم (ملین):", min_value=0.0, value=1.0, step=0.5, key="a_iamt") * 1_000_000
-                elif a_itype == "لاکھ":
-                    inv_a = st.number_input("رقم (لاکھ):", min_value=0.0, value=5.0, step=1.0, key="a_iamt") * 100_000
-                else:
-                    inv_a = st.number_input("رقم (روپے):", min_value=0.0, value=100_000.0, step=10_000.0, key="a_iamt")
-                rate_a = st.number_input("ماہانہ شرح (%):", min_value=0.0, value=3.0, step=0.1, key="a_rate") / 100
-                ded_a  = st.number_input("ماہانہ کٹوتی (روپے):", min_value=0.0, step=500.0, key="a_ded")
-                meth_a = st.radio("طریقہ:", ["مہینے", "سہ ماہی"], horizontal=True, key="a_meth")
-                mo_a   = int(st.number_input("مہینے:" if meth_a == "مہینے" else "سہ ماہی:", min_value=1, value=12, step=1, key="a_mo"))
-                if meth_a == "سہ ماہی":
-                    mo_a *= 3
-
-        # ── Scenario B inputs ─────────────────────────────────────────────────
-        with sc_b_col:
-            st.markdown("#### 📈 " + ("Scenario B" if EN else "منظرنامہ ب"))
-            if EN:
-                b_itype = st.selectbox("Investment type:", ["Millions", "Lacs", "Custom Amount"], key="b_itype")
-                if b_itype == "Millions":
-                    inv_b = st.number_input("Amount (millions):", min_value=0.0, value=1.0, step=0.5, key="b_iamt") * 1_000_000
-                elif b_itype == "Lacs":
-                    inv_b = st.number_input("Amount (lacs):", min_value=0.0, value=5.0, step=1.0, key="b_iamt") * 100_000
-                else:
-                    inv_b = st.number_input("Amount (USD):", min_value=0.0, value=100_000.0, step=10_000.0, key="b_iamt")
-                rate_b = st.number_input("Monthly profit rate (%):", min_value=0.0, value=4.0, step=0.1, key="b_rate") / 100
-                ded_b  = st.number_input("Monthly deduction (USD):", min_value=0.0, step=500.0, key="b_ded")
-                meth_b = st.radio("Method:", ["Months", "Quarters"], horizontal=True, key="b_meth")
-                mo_b   = int(st.number_input("Months:" if meth_b == "Months" else "Quarters:", min_value=1, value=12, step=1, key="b_mo"))
-                if meth_b == "Quarters":
-                    mo_b *= 3
-            else:
-                b_itype = st.selectbox("سرمایہ کاری کی قسم:", ["ملین", "لاکھ", "کسٹم رقم"], key="b_itype")
-                if b_itype == "ملین":
-                    inv_b = st.number_input("رقم (ملین):", min_value=0.0, value=1.0, step=0.5, key="b_iamt") * 1_000_000
-                elif b_itype == "لاکھ":
-                    inv_b = st.number_input("رقم (لاکھ):", min_value=0.0, value=5.0, step=1.0, key="b_iamt") * 100_000
-                else:
-                    inv_b = st.number_input("رقم (روپے):", min_value=0.0, value=100_000.0, step=10_000.0, key="b_iamt")
-                rate_b = st.number_input("ماہانہ شرح (%):", min_value=0.0, value=4.0, step=0.1, key="b_rate") / 100
-                ded_b  = st.number_input("ماہانہ کٹوتی (روپے):", min_value=0.0, step=500.0, key="b_ded")
-                meth_b = st.radio("طریقہ:", ["مہینے", "سہ ماہی"], horizontal=True, key="b_meth")
-                mo_b   = int(st.number_input("مہینے:" if meth_b == "مہینے" else "سہ ماہی:", min_value=1, value=12, step=1, key="b_mo"))
-                if meth_b == "سہ ماہی":
-                    mo_b *= 3
-
-        # ── Calculate both ────────────────────────────────────────────────────
-        res_a = calculate_investment_scenario(inv_a, rate_a, ded_a, mo_a, apply_zakat, apply_tax, income_tax_rate)
-        res_b = calculate_investment_scenario(inv_b, rate_b, ded_b, mo_b, apply_zakat, apply_tax, income_tax_rate)
-
-        # ── Side-by-side metrics ──────────────────────────────────────────────
-        st.markdown("---")
-        st.markdown(
-            f'<p class="section-label">{"Side-by-Side Results" if EN else "موازنہ نتائج"}</p>',
-            unsafe_allow_html=True,
+        st.caption(f"Add, edit or delete rows to compare up to {MAX_SCENARIOS} scenarios." if EN
+                   else f"زیادہ سے زیادہ {MAX_SCENARIOS} منظرنامے موازنہ کرنے کے لیے قطاریں شامل یا تبدیل کریں۔")
+        scenario_table = st.data_editor(
+            pd.DataFrame({
+                "scenario":   ["Scenario A", "Scenario B"] if EN else ["منظرنامہ الف", "منظرنامہ ب"],
+                "investment": [1_000_000.0, 1_000_000.0],
+                "rate_pct":   [3.0, 4.0],
+                "deduction":  [0.0, 0.0],
+                "months":     [12, 12],
+            }),
+            column_config={
+                "scenario":   st.column_config.TextColumn("Scenario" if EN else "منظرنامہ"),
+                "investment": st.column_config.NumberColumn("Amount (USD)" if EN else "رقم (روپے)",
+                                                            min_value=0.0, step=10_000.0, format="%,.0f"),
+                "rate_pct":   st.column_config.NumberColumn("Monthly profit rate (%)" if EN else "ماہانہ شرح (%)",
+                                                            min_value=0.0, step=0.1, format="%.2f"),
+                "deduction":  st.column_config.NumberColumn("Monthly deduction (USD)" if EN else "ماہانہ کٹوتی (روپے)",
+                                                            min_value=0.0, step=500.0, format="%,.0f"),
+                "months":     st.column_config.NumberColumn("Months" if EN else "مہینے",
+                                                            min_value=1, max_value=1200, step=1),
+            },
+            num_rows="dynamic", hide_index=True, use_container_width=True, key="scenario_table",
         )
-        h_a, h_b = st.columns(2)
-        h_a.markdown(f"#### 📊 {'Scenario A' if EN else 'منظرنامہ الف'}")
-        h_b.markdown(f"#### 📈 {'Scenario B' if EN else 'منظرنامہ ب'}")
-
-        for label_en, label_ur, val_a, val_b, delta_a, delta_b in [
-            ("Initial Investment", "ابتدائی سرمایہ", fmt_USD(inv_a), fmt_USD(inv_b), None, None),
-            ("Total Profit",       "کل منافع",        fmt_USD(res_a["total_profit"]), fmt_USD(res_b["total_profit"]),
-             f"+{res_a['roi']:.1f}% ROI", f"+{res_b['roi']:.1f}% ROI"),
-            ("Final Amount",       "حتمی رقم",         fmt_USD(res_a["current"]), fmt_USD(res_b["current"]), None, None),
-            ("Avg Monthly Profit", "اوسط ماہانہ منافع", fmt_USD(res_a["avg_monthly"]), fmt_USD(res_b["avg_monthly"]), None, None),
-        ]:
-            c_left, c_right = st.columns(2)
-            c_left.metric(label_en if EN else label_ur, val_a, delta=delta_a)
-            c_right.metric(label_en if EN else label_ur, val_b, delta=delta_b)
-
-        # ── Verdict box ───────────────────────────────────────────────────────
-        final_diff = res_b["current"] - res_a["current"]
-        pct_diff   = (abs(final_diff) / res_a["current"] * 100) if res_a["current"] > 0 else 0
-        if final_diff > 0:
-            verd_en = (f"📈 <b>Scenario B</b> yields <b>{fmt_USD(final_diff)}</b> more "
-                       f"— a <b>{pct_diff:.1f}%</b> advantage over the projection period.")
-            verd_ur = f"📈 <b>منظرنامہ ب</b> نے <b>{fmt_USD(final_diff)}</b> زیادہ دیے — <b>{pct_diff:.1f}%</b> کا فرق۔"
-            box_cls = "highlight-box-green"
-        elif final_diff < 0:
-            verd_en = (f"📊 <b>Scenario A</b> yields <b>{fmt_USD(abs(final_diff))}</b> more "
-                       f"— a <b>{pct_diff:.1f}%</b> advantage over the projection period.")
-            verd_ur = f"📊 <b>منظرنامہ الف</b> نے <b>{fmt_USD(abs(final_diff))}</b> زیادہ دیے — <b>{pct_diff:.1f}%</b> کا فرق۔"
-            box_cls = "highlight-box"
+        scenarios = scenario_table.dropna(subset=["investment", "rate_pct", "months"])
+        if len(scenarios) > MAX_SCENARIOS:
+            st.caption(f"Only the first {MAX_SCENARIOS} scenarios are compared." if EN
+                       else f"صرف پہلے {MAX_SCENARIOS} منظرنامے موازنہ کیے گئے ہیں۔")
+            scenarios = scenarios.head(MAX_SCENARIOS)
+
+        if scenarios.empty:
+            st.info("Add at least one complete scenario row to compare." if EN else "موازنہ کے لیے کم از کم ایک مکمل منظرنامہ درج کریں۔")
         else:
-            verd_en, verd_ur, box_cls = "Both scenarios yield identical results.", "دونوں یکساں نتائج۔", "highlight-box-orange"
-        st.markdown(f'<div class="{box_cls}">' + (verd_en if EN else verd_ur) + "</div>", unsafe_allow_html=True)
+            # ── Calculate every scenario in one pass ──────────────────────────
+            sc_names = np.array([
+                name if isinstance(name, str) and name.strip() else (f"Scenario {i + 1}" if EN else f"منظرنامہ {i + 1}")
+                for i, name in enumerate(scenarios["scenario"])
+            ])
+            sc_inv    = scenarios["investment"].to_numpy(dtype=float)
+            sc_rate   = scenarios["rate_pct"].to_numpy(dtype=float) / 100
+            sc_months = scenarios["months"].to_numpy(dtype=int)
+            res_n = calculate_investment_scenarios(
+                sc_inv, sc_rate, scenarios["deduction"].fillna(0.0).to_numpy(dtype=float), sc_months,
+                apply_zakat, apply_tax, income_tax_rate,
+            )
+            ranked = np.argsort(-res_n["current"], kind="stable")
+            best   = ranked[0]
 
-        # ── Combined chart ────────────────────────────────────────────────────
-        if show_chart:
+            # ── Best-scenario metrics ─────────────────────────────────────────
             st.markdown("---")
-            df_a_cmp = pd.DataFrame(res_a["rows"])
-            df_b_cmp = pd.DataFrame(res_b["rows"])
-            fig_cmp  = go.Figure()
-            fig_cmp.add_trace(go.Scatter(
-                x=df_a_cmp["Month"], y=df_a_cmp["Total Amount"],
-                name="Scenario A" if EN else "منظرنامہ الف",
-                fill="tozeroy", line=dict(color="#667eea", width=2.5),
-                fillcolor="rgba(102,126,234,0.10)",
-                hovertemplate="Month %{x}<br>A: USD %{y:,.0f}<extra></extra>",
-            ))
-            fig_cmp.add_trace(go.Scatter(
-                x=df_b_cmp["Month"], y=df_b_cmp["Total Amount"],
-                name="Scenario B" if EN else "منظرنامہ ب",
-                fill="tozeroy", line=dict(color="#11998e", width=2.5),
-                fillcolor="rgba(17,153,142,0.10)",
-                hovertemplate="Month %{x}<br>B: USD %{y:,.0f}<extra></extra>",
-            ))
-            fig_cmp.update_layout(
-                title=dict(text="📈 Scenario Comparison — Total Amount Growth" if EN
-                           else "📈 منظرنامے موازنہ — کل رقم کی نمو", x=0.02),
-                xaxis_title="Month" if EN else "مہینہ",
-                yaxis_title="Total Amount (USD)" if EN else "کل رقم (روپے)",
-                hovermode="x unified",
-                plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)",
-                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                height=420, margin=dict(t=60, b=40),
+            st.markdown(
+                f'<p class="section-label">{"Scenario Ranking" if EN else "منظرنامے کی درجہ بندی"}</p>',
+                unsafe_allow_html=True,
             )
-            st.plotly_chart(fig_cmp, use_container_width=True)
-
-        # ── WhatsApp share (compare mode) ─────────────────────────────────────
-        wa_txt = (
-            f"📊 Investment Comparison (Smart Finance Calculator)\n{_SEP}\n"
-            f"Scenario A\n"
-            f"💰 Investment: {fmt_USD(inv_a)}  |  Rate: {rate_a*100:.1f}%/mo  |  {mo_a} months\n"
-            f"📈 Profit: {fmt_USD(res_a['total_profit'])}  |  Final: {fmt_USD(res_a['current'])}\n\n"
-            f"Scenario B\n"
-            f"💰 Investment: {fmt_USD(inv_b)}  |  Rate: {rate_b*100:.1f}%/mo  |  {mo_b} months\n"
-            f"📈 Profit: {fmt_USD(res_b['total_profit'])}  |  Final: {fmt_USD(res_b['current'])}\n"
-            f"{_SEP}\n"
-            f"{'Scenario B wins' if final_diff > 0 else 'Scenario A wins'} by {fmt_USD(abs(final_diff))}\n"
-            f"Calculated with Smart Finance Calculator"
-        ) if EN else (
-            f"📊 سرمایہ کاری موازنہ (سمارٹ فنانس کیلکولیٹر)\n{_SEP}\n"
-            f"منظرنامہ الف: {fmt_USD(inv_a)} | حتمی رقم: {fmt_USD(res_a['current'])}\n"
-            f"منظرنامہ ب: {fmt_USD(inv_b)} | حتمی رقم: {fmt_USD(res_b['current'])}\n"
-            f"{_SEP}\n"
-            f"فرق: {fmt_USD(abs(final_diff))}"
-        )
-        wa_share(wa_txt, "Share Comparison on WhatsApp 📲" if EN else "واٹس ایپ پر موازنہ شیئر کریں 📲")
+            bm1, bm2, bm3, bm4 = st.columns(4)
+            bm1.metric("Best Scenario"   if EN else "بہترین منظرنامہ", sc_names[best])
+            bm2.metric("Final Amount"    if EN else "حتمی رقم",         fmt_USD(res_n["current"][best]))
+            bm3.metric("Total Profit"    if EN else "کل منافع",          fmt_USD(res_n["total_profit"][best]),
+                       delta=f"+{res_n['roi'][best]:.1f}% ROI")
+            bm4.metric("Best vs Worst"   if EN else "بہترین بمقابلہ کمترین",
+                       fmt_USD(res_n["current"][best] - res_n["current"][ranked[-1]]))
+
+            st.dataframe(pd.DataFrame({
+                "#": np.arange(1, len(ranked) + 1),
+                "Scenario"     if EN else "منظرنامہ":         sc_names[ranked],
+                "Investment"   if EN else "ابتدائی سرمایہ":   [fmt_USD(v) for v in sc_inv[ranked]],
+                "Rate"         if EN else "شرح":             [f"{v * 100:.2f}%/mo" for v in sc_rate[ranked]],
+                "Months"       if EN else "مہینے":            sc_months[ranked],
+                "Total Profit" if EN else "کل منافع":          [fmt_USD(v) for v in res_n["total_profit"][ranked]],
+                "ROI":                                         [f"{v:.1f}%" for v in res_n["roi"][ranked]],
+                "Final Amount" if EN else "حتمی رقم":          [fmt_USD(v) for v in res_n["current"][ranked]],
+            }), use_container_width=True, hide_index=True)
+
+            # ── Verdict box ───────────────────────────────────────────────────
+            if len(ranked) > 1:
+                runner_up  = ranked[1]
+                final_diff = res_n["current"][best] - res_n["current"][runner_up]
+                base       = res_n["current"][runner_up]
+                pct_diff   = (final_diff / base * 100) if base > 0 else 0
+                if final_diff > 0:
+                    verd_en = (f"📈 <b>{sc_names[best]}</b> yields <b>{fmt_USD(final_diff)}</b> more than "
+                               f"<b>{sc_names[runner_up]}</b> — a <b>{pct_diff:.1f}%</b> advantage.")
+                    verd_ur = (f"📈 <b>{sc_names[best]}</b> نے <b>{sc_names[runner_up]}</b> سے "
+                               f"<b>{fmt_USD(final_diff)}</b> زیادہ دیے — <b>{pct_diff:.1f}%</b> کا فرق۔")
+                    box_cls = "highlight-box-green"
+                else:
+                    verd_en, verd_ur, box_cls = ("The top scenarios yield identical results.", "سرفہرست منظرنامے یکساں نتائج دیتے ہیں۔",
+                                                 "highlight-box-orange")
+                st.markdown(f'<div class="{box_cls}">' + (verd_en if EN else verd_ur) + "</div>", unsafe_allow_html=True)
+
+            # ── Overlay chart ─────────────────────────────────────────────────
+            if show_chart:
+                st.markdown("---")
+                fig_cmp = go.Figure()
+                for i in ranked:
+                    fig_cmp.add_trace(go.Scatter(
+                        x=res_n["month"][:sc_months[i]], y=res_n["total"][i, :sc_months[i]],
+                        name=sc_names[i], line=dict(width=2.5),
+                        hovertemplate=f"Month %{{x}}<br>{sc_names[i]}: USD %{{y:,.0f}}<extra></extra>",
+                    ))
+                fig_cmp.update_layout(
+                    title=dict(text="📈 Scenario Comparison — Total Amount Growth" if EN
+                               else "📈 منظرنامے موازنہ — کل رقم کی نمو", x=0.02),
+                    xaxis_title="Month" if EN else "مہینہ",
+                    yaxis_title="Total Amount (USD)" if EN else "کل رقم (روپے)",
+                    hovermode="x unified",
+                    plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)",
+                    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+                    height=420, margin=dict(t=60, b=40),
+                )
+                st.plotly_chart(fig_cmp, use_container_width=True)
+
+            # ── WhatsApp share (compare mode) ─────────────────────────────────
+            wa_lines = "\n".join(
+                f"{rank}. {sc_names[i]}: {fmt_USD(sc_inv[i])} @ {sc_rate[i]*100:.1f}%/mo, {sc_months[i]} mo → {fmt_USD(res_n['current'][i])}"
+                if EN else
+                f"{rank}. {sc_names[i]}: {fmt_USD(sc_inv[i])} | حتمی رقم: {fmt_USD(res_n['current'][i])}"
+                for rank, i in enumerate(ranked, start=1)
+            )
+            wa_txt = (
+                f"📊 Investment Comparison (Smart Finance Calculator)\n{_SEP}\n"
+                f"{wa_lines}\n{_SEP}\n"
+                f"🏆 {sc_names[best]} wins\n"
+                f"Calculated with Smart Finance Calculator"
+            ) if EN else (
+                f"📊 سرمایہ کاری موازنہ (سمارٹ فنانس کیلکولیٹر)\n{_SEP}\n"
+                f"{wa_lines}\n{_SEP}\n"
+                f"🏆 {sc_names[best]} بہتر ہے"
+            )
+            wa_share(wa_txt, "Share Comparison on WhatsApp 📲" if EN else "واٹس ایپ پر موازنہ شیئر کریں 📲")
 
     # ══════════════════════════════════════════════════════════════════════════
     #  SINGLE SCENARIO MODE (existing layout, enhanced with Zakat/Tax)
@@ -502,7 +483,7 @@ with tab1:
         # ── Calculation (now uses helper with Zakat/Tax support) ───────────────
         res         = calculate_investment_scenario(investment, profit_rate, deduction_amt, months,
                                                     apply_zakat, apply_tax, income_tax_rate)
-        rows        = res["rows"]
+        inv_frame   = result_frame(res, INVESTMENT_COLUMNS)
         current     = res["current"]
         total_profit = res["total_profit"]
         roi          = res["roi"]
@@ -564,19 +545,18 @@ with tab1:
             )
 
         # ── Chart ─────────────────────────────────────────────────────────────
-        if show_chart and rows:
+        if show_chart and len(inv_frame):
             st.markdown("---")
-            df = pd.DataFrame(rows)
             fig = go.Figure()
             fig.add_trace(go.Scatter(
-                x=df["Month"], y=df["Total Amount"],
+                x=inv_frame["month"], y=inv_frame["total"],
                 name="Total Amount" if EN else "کل رقم",
                 fill="tozeroy", line=dict(color="#667eea", width=2.5),
                 fillcolor="rgba(102,126,234,0.12)",
                 hovertemplate="Month %{x}<br>Total: USD %{y:,.0f}<extra></extra>",
             ))
             fig.add_trace(go.Bar(
-                x=df["Month"], y=df["Monthly Profit"],
+                x=inv_frame["month"], y=inv_frame["monthly_profit"],
                 name="Monthly Profit" if EN else "ماہانہ منافع",
                 marker_color="rgba(118,75,162,0.65)", yaxis="y2",
                 hovertemplate="Month %{x}<br>Profit: USD %{y:,.0f}<extra></extra>",
@@ -593,30 +573,20 @@ with tab1:
             st.plotly_chart(fig, use_container_width=True)
 
         # ── Breakdown Table + Export ───────────────────────────────────────────
-        if show_breakdown and rows:
+        if show_breakdown and len(inv_frame):
             st.markdown("---")
             st.markdown(
                 f'<p class="section-label">{"Monthly Breakdown" if EN else "ماہانہ تفصیل"}</p>',
                 unsafe_allow_html=True,
             )
-            df_disp = pd.DataFrame(rows)
-            # Format numeric columns
-            for c_name in ["Monthly Profit", "Total Amount", "Tax Deducted", "Zakat Deducted"]:
-                if c_name in df_disp.columns:
-                    df_disp[c_name] = df_disp[c_name].map(lambda x: f"USD {x:,.0f}")
             # Drop unused deduction columns
-            if not apply_tax   and "Tax Deducted"   in df_disp.columns: df_disp.drop(columns=["Tax Deducted"],   inplace=True)
-            if not apply_zakat and "Zakat Deducted" in df_disp.columns: df_disp.drop(columns=["Zakat Deducted"], inplace=True)
-            # Translate column headers for Urdu
-            if not EN:
-                df_disp.rename(columns={"Month": "مہینہ", "Monthly Profit": "ماہانہ منافع",
-                                        "Tax Deducted": "ٹیکس کٹوتی", "Zakat Deducted": "زکوٰۃ کٹوتی",
-                                        "Total Amount": "کل رقم"}, inplace=True)
-            st.dataframe(df_disp, use_container_width=True, hide_index=True)
+            hidden = ([] if apply_tax else ["tax"]) + ([] if apply_zakat else ["zakat"])
+            st.dataframe(display_table(inv_frame, INVESTMENT_COLUMNS, EN, hide=hidden),
+                         use_container_width=True, hide_index=True)
 
             st.download_button(
                 "📥 Download CSV" if EN else "📥 CSV ڈاؤن لوڈ کریں",
-                data=pd.DataFrame(rows).to_csv(index=False),
+                data=csv_export(inv_frame, INVESTMENT_COLUMNS, EN),
                 file_name="investment_breakdown.csv",
                 mime="text/csv",
             )
@@ -695,40 +665,14 @@ with tab2:
             tax_rate        = st.number_input("سالانہ ٹیکس کی شرح (%):", min_value=0.0, max_value=100.0, value=0.0, step=0.5)
 
     # ── Rent Calculation ──────────────────────────────────────────────────────
-    rent_rows = []
-    current_rent      = initial_rent
-    total_gross       = 0.0
-    total_net         = 0.0
-    total_vacancy_loss = 0.0
-    total_expenses    = 0.0
-    total_tax         = 0.0
-
-    for yr in range(1, years + 1):
-        gross           = current_rent * 12
-        vac_loss        = gross * (vacancy_rate / 100)
-        expenses        = monthly_expense * 12
-        effective_gross = gross - vac_loss
-        tax             = effective_gross * (tax_rate / 100)
-        net             = effective_gross - expenses - tax
-
-        total_gross        += gross
-        total_net          += net
-        total_vacancy_loss += vac_loss
-        total_expenses     += expenses
-        total_tax          += tax
-
-        rent_rows.append({
-            "Year"          if EN else "سال":          yr,
-            "Monthly Rent"  if EN else "ماہانہ کرایہ": round(current_rent, 0),
-            "Gross Annual"  if EN else "مجموعی سالانہ": round(gross, 0),
-            "Vacancy Loss"  if EN else "خالی نقصان":   round(vac_loss, 0),
-            "Expenses"      if EN else "اخراجات":       round(expenses, 0),
-            "Tax"           if EN else "ٹیکس":          round(tax, 0),
-            "Net Income"    if EN else "خالص آمدنی":    round(net, 0),
-        })
-        current_rent *= 1 + annual_increase / 100
-
-    final_monthly_rent = initial_rent * ((1 + annual_increase / 100) ** years)
+    rent_res           = rent_projection(initial_rent, years, annual_increase, monthly_expense, vacancy_rate, tax_rate)
+    rent_frame         = result_frame(rent_res, RENT_COLUMNS)
+    total_gross        = rent_res["total_gross"]
+    total_net          = rent_res["total_net"]
+    total_vacancy_loss = rent_res["total_vacancy_loss"]
+    total_expenses     = rent_res["total_expenses"]
+    total_tax          = rent_res["total_tax"]
+    final_monthly_rent = rent_res["final_monthly_rent"]
 
     # ── Rent Metrics ──────────────────────────────────────────────────────────
     st.markdown("---")
@@ -759,29 +703,23 @@ with tab2:
         )
 
     # ── Rent Chart ────────────────────────────────────────────────────────────
-    if show_chart and rent_rows:
+    if show_chart and len(rent_frame):
         st.markdown("---")
-        df_r = pd.DataFrame(rent_rows)
-        yr_col    = "Year"         if EN else "سال"
-        gross_col = "Gross Annual" if EN else "مجموعی سالانہ"
-        net_col   = "Net Income"   if EN else "خالص آمدنی"
-        rent_col  = "Monthly Rent" if EN else "ماہانہ کرایہ"
-
         fig2 = go.Figure()
         fig2.add_trace(go.Bar(
-            x=df_r[yr_col], y=df_r[gross_col],
+            x=rent_frame["year"], y=rent_frame["gross"],
             name="Gross Annual Income" if EN else "مجموعی سالانہ آمدنی",
             marker_color="rgba(17,153,142,0.72)",
             hovertemplate="Year %{x}<br>Gross: USD %{y:,.0f}<extra></extra>",
         ))
         fig2.add_trace(go.Bar(
-            x=df_r[yr_col], y=df_r[net_col],
+            x=rent_frame["year"], y=rent_frame["net"],
             name="Net Annual Income" if EN else "خالص سالانہ آمدنی",
             marker_color="rgba(56,239,125,0.75)",
             hovertemplate="Year %{x}<br>Net: USD %{y:,.0f}<extra></extra>",
         ))
         fig2.add_trace(go.Scatter(
-            x=df_r[yr_col], y=df_r[rent_col],
+            x=rent_frame["year"], y=rent_frame["monthly_rent"],
             name="Monthly Rent" if EN else "ماہانہ کرایہ",
             line=dict(color="#ff6b6b", width=2.5, dash="dot"),
             yaxis="y2",
@@ -808,14 +746,11 @@ with tab2:
         f'<p class="section-label">{"Year-by-Year Breakdown" if EN else "سال بہ سال تفصیل"}</p>',
         unsafe_allow_html=True,
     )
-    df_r_disp = pd.DataFrame(rent_rows).copy()
-    for col in list(df_r_disp.columns)[1:]:
-        df_r_disp[col] = df_r_disp[col].map(lambda x: f"USD {x:,.0f}")
-    st.dataframe(df_r_disp, use_container_width=True, hide_index=True)
+    st.dataframe(display_table(rent_frame, RENT_COLUMNS, EN), use_container_width=True, hide_index=True)
 
     st.download_button(
         "📥 Download Rent Projection CSV" if EN else "📥 کرایہ پروجیکشن CSV ڈاؤن لوڈ کریں",
-        data=pd.DataFrame(rent_rows).to_csv(index=False),
+        data=csv_export(rent_frame, RENT_COLUMNS, EN),
         file_name="rent_projection.csv",
         mime="text/csv",
     )
@@ -893,39 +828,21 @@ with tab3:
     bc_total_pot  = bc_N * bc_c        # pot size = full monthly round
     bc_total_paid = bc_N * bc_c        # you pay c for all N months
 
-    # Apparent annualised return: what you appear to get vs what you've paid *at draw month*
-    paid_at_draw = bc_D * bc_c
-    if paid_at_draw > 0 and bc_D > 0:
-        bc_apparent_return = ((bc_total_pot / paid_at_draw) - 1) / (bc_D / 12) * 100
-    else:
-        bc_apparent_return = 0.0
-
-    # Fair comparison: both scenarios pay bc_c per month for bc_N months.
-    # Invest scenario: invest bc_c/month at bc_comp_rate → FV at month N
-    if bc_comp_rate > 0:
-        invest_fv = bc_c * ((1 + bc_comp_rate) ** bc_N - 1) / bc_comp_rate
-    else:
-        invest_fv = bc_c * bc_N
-
-    # BC scenario: receive bc_total_pot at month D, invest it for (N-D) months
-    bc_remaining = bc_N - bc_D
-    bc_fv_final  = bc_total_pot * (1 + bc_comp_rate) ** bc_remaining
-    bc_advantage = bc_fv_final - invest_fv   # positive → BC wins; negative → investing wins
+    # Every draw position at once: row 0 is the chosen comparison rate, the rest the heatmap grid.
+    # Fair comparison: both scenarios pay bc_c per month for bc_N months; the BC scenario
+    # receives bc_total_pot at month D and invests it for the remaining N-D months.
+    bc_grid  = committee_positions(bc_N, bc_c, np.concatenate(([bc_comp_rate], BC_RATE_GRID_PCT / 100)))
+    invest_fv          = bc_grid["invest_fv"][0]
+    bc_remaining       = bc_N - bc_D
+    bc_fv_final        = bc_grid["bc_fv"][0, bc_D - 1]
+    bc_advantage       = bc_grid["advantage"][0, bc_D - 1]   # positive → BC wins; negative → investing wins
+    bc_apparent_return = bc_grid["apparent_return"][bc_D - 1]
+    bc_break_even      = int(bc_grid["break_even"][0])
+    # True yearly rate of each position's own cash flows (−c every month, +pot at its draw month).
+    bc_true_rate       = effective_annual_rate(irr(committee_cash_flows(bc_N, bc_c), guess=0.0)) * 100
 
     # Cash-flow table: net position each month
-    bc_rows = []
-    for m in range(1, bc_N + 1):
-        cum_paid    = m * bc_c
-        pot_this_m  = bc_total_pot if m == bc_D else 0.0
-        # After draw month, pot received offsets cumulative paid
-        net_pos     = (bc_total_pot if m >= bc_D else 0.0) - cum_paid
-        bc_rows.append({
-            "Month"           if EN else "مہینہ":         m,
-            "Your Payment"    if EN else "آپ کی ادائیگی": round(bc_c, 0),
-            "Cumulative Paid" if EN else "کل ادا کردہ":   round(cum_paid, 0),
-            "Pot Received"    if EN else "پاٹ موصول":      round(pot_this_m, 0),
-            "Net Position"    if EN else "خالص پوزیشن":   round(net_pos, 0),
-        })
+    bc_frame = result_frame(committee_cash_flow(bc_N, bc_c, bc_D), BC_COLUMNS)
 
     # ── BC Metrics ────────────────────────────────────────────────────────────
     st.markdown("---")
@@ -948,6 +865,13 @@ with tab3:
     bcm4.metric(
         "Apparent Annual Return" if EN else "ظاہری سالانہ واپسی",
         f"{bc_apparent_return:.0f}%",
+        delta=(f"True rate (IRR): {bc_true_rate[bc_D - 1]:.1f}%" if EN
+               else f"اصل شرح (IRR): {bc_true_rate[bc_D - 1]:.1f}%"),
+        delta_color="off",
+        help=("Pot received ÷ amount paid in before the draw, annualised. The true rate (IRR) of every position is 0%: "
+              "early drawers borrow interest-free and late drawers save interest-free." if EN
+              else "قرعہ اندازی سے پہلے ادا کردہ رقم پر پاٹ کا سالانہ تناسب۔ ہر پوزیشن کی اصل شرح (IRR) 0% ہے: "
+                   "جلد پانے والے بلا سود قرض لیتے ہیں اور دیر سے پانے والے بلا سود بچت کرتے ہیں۔"),
     )
 
     # ── Insight Box ───────────────────────────────────────────────────────────
@@ -989,27 +913,23 @@ with tab3:
         )
 
     # ── BC Chart ──────────────────────────────────────────────────────────────
-    if show_chart and bc_rows:
+    if show_chart and len(bc_frame):
         st.markdown("---")
-        df_bc       = pd.DataFrame(bc_rows)
-        net_col_bc  = "Net Position"    if EN else "خالص پوزیشن"
-        cum_col_bc  = "Cumulative Paid" if EN else "کل ادا کردہ"
-        mo_col_bc   = "Month"           if EN else "مہینہ"
 
         bar_colors = [
             "rgba(239,68,68,0.75)" if v < 0 else "rgba(34,197,94,0.75)"
-            for v in df_bc[net_col_bc]
+            for v in bc_frame["net_position"]
         ]
 
         fig_bc = go.Figure()
         fig_bc.add_trace(go.Bar(
-            x=df_bc[mo_col_bc], y=df_bc[net_col_bc],
+            x=bc_frame["month"], y=bc_frame["net_position"],
             name="Net Position"    if EN else "خالص پوزیشن",
             marker_color=bar_colors,
             hovertemplate="Month %{x}<br>Net: USD %{y:,.0f}<extra></extra>",
         ))
         fig_bc.add_trace(go.Scatter(
-            x=df_bc[mo_col_bc], y=df_bc[cum_col_bc],
+            x=bc_frame["month"], y=bc_frame["cumulative_paid"],
             name="Cumulative Paid" if EN else "کل ادا کردہ",
             line=dict(color="#f7971e", width=2.5, dash="dot"),
             yaxis="y2",
@@ -1039,21 +959,73 @@ with tab3:
         )
         st.plotly_chart(fig_bc, use_container_width=True)
 
+    # ── Every Draw Position ───────────────────────────────────────────────────
+    st.markdown("---")
+    st.markdown(
+        f'<p class="section-label">{"Every Draw Position" if EN else "ہر قرعہ اندازی پوزیشن"}</p>',
+        unsafe_allow_html=True,
+    )
+    bc_expected_adv = round(bc_grid["expected_advantage"][0])
+    ap1, ap2, ap3 = st.columns(3)
+    ap1.metric(
+        "Break-even Position" if EN else "برابری کی پوزیشن",
+        (f"{bc_break_even} of {bc_N}" if EN else f"{bc_break_even} از {bc_N}") if bc_break_even else ("None" if EN else "کوئی نہیں"),
+        help=(f"Drawing at any position up to this one matches or beats investing at {bc_comp_rate*100:.1f}%/mo." if EN
+              else f"اس پوزیشن تک قرعہ اندازی {bc_comp_rate*100:.1f}% ماہانہ سرمایہ کاری کے برابر یا بہتر ہے۔"),
+    )
+    ap2.metric("Winning Positions" if EN else "بہتر پوزیشنز", f"{bc_grid['win_share'][0]*100:.0f}%")
+    ap3.metric(
+        "Expected Value (random draw)" if EN else "متوقع قدر (قرعہ اندازی)",
+        fmt_USD(bc_grid["expected_fv"][0]),
+        delta=(f"{bc_expected_adv:+,} vs investing" if EN else f"{bc_expected_adv:+,} بمقابلہ سرمایہ کاری"),
+        delta_color="off",
+    )
+
+    if show_chart:
+        fig_pos = go.Figure(go.Heatmap(
+            x=bc_grid["positions"], y=BC_RATE_GRID_PCT, z=bc_grid["advantage"][1:],
+            colorscale="RdYlGn", zmid=0,
+            colorbar=dict(title="BC − Invest (USD)" if EN else "کمیٹی − سرمایہ کاری"),
+            hovertemplate="Position %{x}<br>Rate %{y:.2f}%/mo<br>BC vs Invest: USD %{z:,.0f}<extra></extra>",
+        ))
+        fig_pos.add_trace(go.Scatter(
+            x=[bc_D], y=[bc_comp_rate * 100], mode="markers",
+            marker=dict(symbol="x", size=12, color="#1a1a2e"),
+            name="Your position" if EN else "آپ کی پوزیشن",
+            hovertemplate="Position %{x}<br>Rate %{y:.2f}%/mo<extra></extra>",
+        ))
+        fig_pos.update_layout(
+            title=dict(text="🎯 BC vs Investing — Every Draw Position × Comparison Rate" if EN
+                       else "🎯 کمیٹی بمقابلہ سرمایہ کاری — ہر پوزیشن × شرح", x=0.02),
+            xaxis=dict(title="Draw position" if EN else "قرعہ اندازی پوزیشن", dtick=max(1, bc_N // 10)),
+            yaxis_title="Comparison rate (% monthly)" if EN else "موازنہ شرح (% ماہانہ)",
+            showlegend=False,
+            plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)",
+            height=420, margin=dict(t=60, b=40),
+        )
+        st.plotly_chart(fig_pos, use_container_width=True)
+
+    if show_breakdown:
+        st.dataframe(pd.DataFrame({
+            "Position"               if EN else "پوزیشن":             bc_grid["positions"],
+            "Pot Value at Month N"   if EN else "مہینہ N پر پاٹ":      [f"USD {v:,.0f}" for v in bc_grid["bc_fv"][0]],
+            "BC vs Investing"        if EN else "کمیٹی بمقابلہ سرمایہ کاری": [f"USD {v:,.0f}" for v in bc_grid["advantage"][0]],
+            "Apparent Annual Return" if EN else "ظاہری سالانہ واپسی":  [f"{v:.0f}%" for v in bc_grid["apparent_return"]],
+            "True Annual Rate (IRR)" if EN else "اصل سالانہ شرح (IRR)": [f"{v:.1f}%" for v in bc_true_rate],
+        }), use_container_width=True, hide_index=True)
+
     # ── BC Table + Export ─────────────────────────────────────────────────────
-    if show_breakdown and bc_rows:
+    if show_breakdown and len(bc_frame):
         st.markdown("---")
         st.markdown(
             f'<p class="section-label">{"Month-by-Month Cash Flow" if EN else "مہینہ بہ مہینہ کیش فلو"}</p>',
             unsafe_allow_html=True,
         )
-        df_bc_disp = pd.DataFrame(bc_rows).copy()
-        for col in list(df_bc_disp.columns)[1:]:
-            df_bc_disp[col] = df_bc_disp[col].map(lambda x: f"USD {x:,.0f}")
-        st.dataframe(df_bc_disp, use_container_width=True, hide_index=True)
+        st.dataframe(display_table(bc_frame, BC_COLUMNS, EN), use_container_width=True, hide_index=True)
 
     st.download_button(
         "📥 Download Committee CSV" if EN else "📥 کمیٹی CSV ڈاؤن لوڈ کریں",
-        data=pd.DataFrame(bc_rows).to_csv(index=False),
+        data=csv_export(bc_frame, BC_COLUMNS, EN),
         file_name="committee_cashflow.csv",
         mime="text/csv",
         key="bc_dl",
@@ -1121,60 +1093,31 @@ with tab4:
         if EN:
             extra_payment = st.number_input("Extra monthly payment (USD, optional):", min_value=0.0, value=0.0, step=1_000.0, key="loan_extra")
             st.caption("Adding extra principal payments each month reduces your tenure and total interest paid.")
+            loan_fees = st.number_input("Upfront fees / processing charges (USD):", min_value=0.0, value=0.0, step=1_000.0, key="loan_fees")
         else:
             extra_payment = st.number_input("اضافی ماہانہ ادائیگی (روپے، اختیاری):", min_value=0.0, value=0.0, step=1_000.0, key="loan_extra")
             st.caption("ماہانہ اضافی اصل رقم ادا کرنے سے مدت اور کل سود کم ہوتا ہے۔")
+            loan_fees = st.number_input("پیشگی فیس / پروسیسنگ چارجز (روپے):", min_value=0.0, value=0.0, step=1_000.0, key="loan_fees")
 
     # ── EMI Calculation ───────────────────────────────────────────────────────
-    loan_n         = loan_years * 12
-    loan_r         = loan_rate_annual / 12 / 100   # monthly rate
-
-    if loan_r > 0 and loan_principal > 0:
-        emi = loan_principal * loan_r * (1 + loan_r) ** loan_n / ((1 + loan_r) ** loan_n - 1)
-    elif loan_principal > 0:
-        emi = loan_principal / loan_n
-    else:
-        emi = 0.0
-
-    total_paid_std    = emi * loan_n
-    total_interest_std = total_paid_std - loan_principal
-    interest_pct      = (total_interest_std / loan_principal * 100) if loan_principal > 0 else 0.0
+    loan_n             = loan_years * 12
+    loan_res           = amortization_schedule(loan_principal, loan_rate_annual, loan_years, extra_payment)
+    emi_frame          = result_frame(loan_res, LOAN_COLUMNS)
+    emi                = loan_res["emi"]
+    total_interest_std = loan_res["total_interest_std"]
+    interest_pct       = (total_interest_std / loan_principal * 100) if loan_principal > 0 else 0.0
 
     # Amortisation with optional extra payment
-    balance              = loan_principal
-    emi_rows             = []
-    total_interest_actual = 0.0
-    actual_months        = loan_n
-
-    for m in range(1, loan_n + 1):
-        interest_pmt   = balance * loan_r
-        principal_pmt  = emi - interest_pmt
-        extra_this_mo  = min(extra_payment, max(0.0, balance - principal_pmt))
-        total_monthly  = emi + extra_this_mo
-        principal_pmt += extra_this_mo
-        balance       -= principal_pmt
-
-        if balance <= 0:
-            # Final payment adjustment
-            balance       = 0.0
-            total_monthly = interest_pmt + (principal_pmt + balance)  # balance already 0
-            actual_months = m
-
-        total_interest_actual += interest_pmt
-        emi_rows.append({
-            "Month"     if EN else "مہینہ":     m,
-            "EMI"       if EN else "قسط":        round(total_monthly, 0),
-            "Principal" if EN else "اصل رقم":   round(principal_pmt, 0),
-            "Interest"  if EN else "سود":        round(interest_pmt, 0),
-            "Balance"   if EN else "باقی رقم":   round(max(balance, 0.0), 0),
-        })
-
-        if balance <= 0:
-            break
-
-    months_saved   = loan_n - actual_months
-    interest_saved = max(0.0, total_interest_std - total_interest_actual)
-    total_paid_actual = sum(r["EMI" if EN else "قسط"] for r in emi_rows)
+    total_interest_actual = loan_res["total_interest"]
+    total_paid_actual     = loan_res["total_paid"]
+    actual_months         = loan_res["months"]
+    months_saved          = loan_n - actual_months
+    interest_saved        = max(0.0, total_interest_std - total_interest_actual)
+
+    # True cost: IRR of the cash actually received (principal less fees) against the payments made
+    loan_irr     = irr(loan_cash_flows(loan_principal, loan_res["payments"], loan_fees)) if actual_months else float("nan")
+    loan_apr     = loan_irr * 12 * 100
+    loan_ear     = effective_annual_rate(loan_irr) * 100
 
     # ── EMI Metrics ───────────────────────────────────────────────────────────
     st.markdown("---")
@@ -1188,6 +1131,22 @@ with tab4:
     em3.metric("Total Interest"       if EN else "کل سود",              fmt_USD(total_interest_actual))
     em4.metric("Interest % of Principal" if EN else "اصل کا سود %",    f"{interest_pct:.1f}%")
 
+    ea1, ea2 = st.columns(2)
+    ea1.metric(
+        "APR (nominal)" if EN else "اے پی آر (برائے نام)",
+        "—" if np.isnan(loan_apr) else f"{loan_apr:.2f}%",
+        delta=(f"{loan_apr - loan_rate_annual:+.2f}% vs quoted rate" if EN
+               else f"{loan_apr - loan_rate_annual:+.2f}% بمقابلہ بتائی گئی شرح") if loan_fees > 0 and not np.isnan(loan_apr) else None,
+        delta_color="inverse",
+        help=("Monthly IRR of the cash you receive (loan less fees) against every payment, × 12." if EN
+              else "موصول رقم (قرض منہا فیس) اور تمام ادائیگیوں کی ماہانہ IRR × 12۔"),
+    )
+    ea2.metric(
+        "Effective Annual Rate" if EN else "مؤثر سالانہ شرح",
+        "—" if np.isnan(loan_ear) else f"{loan_ear:.2f}%",
+        help=("The monthly IRR compounded over 12 months." if EN else "ماہانہ IRR کی 12 مہینوں کی مرکب شرح۔"),
+    )
+
     # Extra-payment savings cards
     if extra_payment > 0 and months_saved > 0:
         st.markdown("")
@@ -1236,29 +1195,24 @@ with tab4:
         )
 
     # ── EMI Chart ─────────────────────────────────────────────────────────────
-    if show_chart and emi_rows:
+    if show_chart and len(emi_frame):
         st.markdown("---")
-        df_emi     = pd.DataFrame(emi_rows)
-        mo_col_e   = "Month"     if EN else "مہینہ"
-        prin_col_e = "Principal" if EN else "اصل رقم"
-        int_col_e  = "Interest"  if EN else "سود"
-        bal_col_e  = "Balance"   if EN else "باقی رقم"
 
         fig_emi = go.Figure()
         fig_emi.add_trace(go.Bar(
-            x=df_emi[mo_col_e], y=df_emi[prin_col_e],
+            x=emi_frame["month"], y=emi_frame["principal"],
             name="Principal" if EN else "اصل رقم",
             marker_color="rgba(102,126,234,0.75)",
             hovertemplate="Month %{x}<br>Principal: USD %{y:,.0f}<extra></extra>",
         ))
         fig_emi.add_trace(go.Bar(
-            x=df_emi[mo_col_e], y=df_emi[int_col_e],
+            x=emi_frame["month"], y=emi_frame["interest"],
             name="Interest" if EN else "سود",
             marker_color="rgba(203,45,62,0.65)",
             hovertemplate="Month %{x}<br>Interest: USD %{y:,.0f}<extra></extra>",
         ))
         fig_emi.add_trace(go.Scatter(
-            x=df_emi[mo_col_e], y=df_emi[bal_col_e],
+            x=emi_frame["month"], y=emi_frame["balance"],
             name="Remaining Balance" if EN else "باقی رقم",
             line=dict(color="#ffd200", width=2.5),
             yaxis="y2",
@@ -1280,20 +1234,17 @@ with tab4:
         st.plotly_chart(fig_emi, use_container_width=True)
 
     # ── Amortisation Table + Export ───────────────────────────────────────────
-    if show_breakdown and emi_rows:
+    if show_breakdown and len(emi_frame):
         st.markdown("---")
         st.markdown(
             f'<p class="section-label">{"Full Amortisation Schedule" if EN else "مکمل ادائیگی کا شیڈول"}</p>',
             unsafe_allow_html=True,
         )
-        df_emi_disp = pd.DataFrame(emi_rows).copy()
-        for col in list(df_emi_disp.columns)[1:]:
-            df_emi_disp[col] = df_emi_disp[col].map(lambda x: f"USD {x:,.0f}")
-        st.dataframe(df_emi_disp, use_container_width=True, hide_index=True)
+        st.dataframe(display_table(emi_frame, LOAN_COLUMNS, EN), use_container_width=True, hide_index=True)
 
     st.download_button(
         "📥 Download Amortisation CSV" if EN else "📥 ادائیگی شیڈول CSV ڈاؤن لوڈ کریں",
-        data=pd.DataFrame(emi_rows).to_csv(index=False),
+        data=csv_export(emi_frame, LOAN_COLUMNS, EN),
         file_name="loan_amortisation.csv",
         mime="text/csv",
         key="emi_dl",
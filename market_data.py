@@ -0,0 +1,358 @@
+"""Local price-history store for the market benchmark fetch."""
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "prices")
+DEFAULT_TTL_SECONDS = 60 * 60
+DEFAULT_RETRY_SECONDS = 60
+DEFAULT_FETCH_TIMEOUT_SECONDS = 15
+
+
+# ── Fetchers ──────────────────────────────────────────────────────────────────
+def yfinance_fetcher(symbol: str, start=None, timeout: float = 10) -> pd.DataFrame:
+    """Daily bars from Yahoo Finance; full history when ``start`` is None."""
+    import yfinance as yf
+
+    if start is None:
+        return yf.Ticker(symbol).history(period="max", timeout=timeout)
+    return yf.Ticker(symbol).history(start=start, timeout=timeout)
+
+
+class CsvFixtureFetcher:
+    """Offline stand-in for ``yfinance_fetcher`` that reads ``<directory>/<symbol>.csv``.
+
+    The CSV needs a ``Date`` column and a ``Close`` column.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def __call__(self, symbol: str, start=None) -> pd.DataFrame:
+        path = os.path.join(self.directory, f"{symbol}.csv")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No fixture prices for {symbol} at {path}")
+        frame = pd.read_csv(path, parse_dates=["Date"], index_col="Date")
+        if start is not None:
+            frame = frame[frame.index >= pd.Timestamp(start)]
+        return frame
+
+
+def default_fetcher():
+    """Fixture fetcher when ``PRICE_FIXTURE_DIR`` is set, Yahoo Finance otherwise."""
+    fixture_dir = os.environ.get("PRICE_FIXTURE_DIR")
+    return CsvFixtureFetcher(fixture_dir) if fixture_dir else yfinance_fetcher
+
+
+# ── Cache ─────────────────────────────────────────────────────────────────────
+class PriceHistoryCache:
+    """SQLite-backed daily close history keyed by symbol.
+
+    A symbol is re-fetched at most once per ``ttl_seconds``. A re-fetch only
+    asks for bars from the latest stored date onwards (that bar is replaced,
+    since today's bar moves until the close). If the fetch fails, the stored
+    history is returned as-is, the error is kept in ``errors`` and the symbol
+    is not retried for ``retry_seconds``.
+    """
+
+    def __init__(self, directory=None, ttl_seconds: float = DEFAULT_TTL_SECONDS, fetcher=None,
+                 retry_seconds: float = DEFAULT_RETRY_SECONDS):
+        self.directory = directory or os.environ.get("PRICE_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.ttl_seconds = ttl_seconds
+        self.retry_seconds = retry_seconds
+        self.fetcher = fetcher or default_fetcher()
+        self.errors = {}
+        self._failed_at = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, "history.sqlite3")
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS bars ("
+                         "symbol TEXT NOT NULL, date TEXT NOT NULL, close REAL NOT NULL, "
+                         "PRIMARY KEY (symbol, date))")
+            conn.execute("CREATE TABLE IF NOT EXISTS fetches (symbol TEXT PRIMARY KEY, fetched_at REAL NOT NULL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _fetched_at(self, conn, symbol):
+        row = conn.execute("SELECT fetched_at FROM fetches WHERE symbol = ?", (symbol,)).fetchone()
+        return row[0] if row else None
+
+    def _latest_date(self, conn, symbol):
+        return conn.execute("SELECT MAX(date) FROM bars WHERE symbol = ?", (symbol,)).fetchone()[0]
+
+    def is_fresh(self, symbol: str) -> bool:
+        """True when the symbol was fetched within the TTL."""
+        with self._connect() as conn:
+            fetched_at = self._fetched_at(conn, symbol)
+        return fetched_at is not None and time.time() - fetched_at < self.ttl_seconds
+
+    def needs_refresh(self, symbol: str) -> bool:
+        """True when the symbol is stale and has not just failed to fetch."""
+        failed_at = self._failed_at.get(symbol)
+        if failed_at is not None and time.time() - failed_at < self.retry_seconds:
+            return False
+        return not self.is_fresh(symbol)
+
+    def refresh(self, symbol: str) -> int:
+        """Fetch and store bars newer than the latest stored date; return how many were written."""
+        with self._connect() as conn:
+            latest = self._latest_date(conn, symbol)
+        frame = self.fetcher(symbol, start=latest)
+        closes = frame["Close"].dropna() if len(frame) else pd.Series(dtype=float)
+        index = pd.DatetimeIndex(closes.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        rows = [(symbol, d, float(c)) for d, c in zip(index.strftime("%Y-%m-%d"), closes.to_numpy())
+                if latest is None or d >= latest]
+        with self._lock, self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO bars (symbol, date, close) VALUES (?, ?, ?)", rows)
+            conn.execute("INSERT OR REPLACE INTO fetches (symbol, fetched_at) VALUES (?, ?)", (symbol, time.time()))
+        self.errors.pop(symbol, None)
+        self._failed_at.pop(symbol, None)
+        return len(rows)
+
+    def stored(self, symbol: str, years=None) -> pd.DataFrame:
+        """Stored history without touching the network (may be empty)."""
+        query = "SELECT date, close FROM bars WHERE symbol = ?"
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY date", (symbol,)).fetchall()
+        frame = pd.DataFrame(rows, columns=["Date", "Close"])
+        frame.index = pd.DatetimeIndex(pd.to_datetime(frame.pop("Date")), name="Date")
+        if years is not None and len(frame):
+            frame = frame[frame.index >= frame.index[-1] - pd.DateOffset(years=years)]
+        return frame
+
+    def history(self, symbol: str, years=None) -> pd.DataFrame:
+        """Daily closes for ``symbol`` (the last ``years`` only, if given), refreshing when stale."""
+        if self.needs_refresh(symbol):
+            try:
+                self.refresh(symbol)
+            except Exception as e:
+                self.errors[symbol] = e
+                self._failed_at[symbol] = time.time()
+        return self.stored(symbol, years)
+
+
+# ── Background fetch ──────────────────────────────────────────────────────────
+class BackgroundFetcher:
+    """Refreshes symbols on worker threads so callers never wait on the network.
+
+    ``poll`` returns at once with a status and whatever history is stored:
+    ``"ready"`` when the stored history is current, ``"pending"`` while a
+    refresh is in flight, and ``"timeout"`` once that refresh has run longer
+    than ``timeout_seconds`` (the worker is left to finish on its own and the
+    symbol is not resubmitted until it does).
+    """
+
+    def __init__(self, cache: PriceHistoryCache, timeout_seconds: float = DEFAULT_FETCH_TIMEOUT_SECONDS,
+                 max_workers: int = 4):
+        self.cache = cache
+        self.timeout_seconds = timeout_seconds
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="price-fetch")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def poll(self, symbol: str, years=None):
+        """Return ``(status, history)`` without blocking, starting a refresh if one is due."""
+        with self._lock:
+            job = self._jobs.get(symbol)
+            if job is None and self.cache.needs_refresh(symbol):
+                job = self._jobs[symbol] = (self._pool.submit(self.cache.history, symbol), time.monotonic())
+            if job is not None:
+                future, submitted_at = job
+                if not future.done():
+                    status = "timeout" if time.monotonic() - submitted_at > self.timeout_seconds else "pending"
+                    return status, self.cache.stored(symbol, years)
+                del self._jobs[symbol]
+        return "ready", self.cache.stored(symbol, years)
+
+
+# ── Benchmark board ───────────────────────────────────────────────────────────
+CAGR_WINDOWS_YEARS = (1, 3, 5, 10)
+
+
+def trailing_cagr_pct(closes: pd.Series, years=None):
+    """CAGR (%) between the first and last close of the trailing ``years`` window.
+
+    Returns None when there is not enough history to cover the window.
+    """
+    closes = closes.dropna()
+    if len(closes) < 2:
+        return None
+    end_date = closes.index[-1]
+    if years is not None:
+        window_start = end_date - pd.DateOffset(years=years)
+        # Allow a few days of slack for weekends/holidays at the window edge.
+        if closes.index[0] > window_start + pd.Timedelta(days=7):
+            return None
+        closes = closes[closes.index >= window_start]
+    years_data = (end_date - closes.index[0]).days / 365.25
+    if years_data <= 0:
+        return None
+    return ((closes.iloc[-1] / closes.iloc[0]) ** (1 / years_data) - 1) * 100
+
+
+def benchmark_stats(frame: pd.DataFrame) -> dict:
+    """Last price, daily change and trailing CAGRs for one symbol's daily history."""
+    closes = frame["Close"].dropna()
+    if len(closes) < 2:
+        return {}
+    stats = {
+        "last_price": float(closes.iloc[-1]),
+        "day_change_pct": float((closes.iloc[-1] - closes.iloc[-2]) / closes.iloc[-2] * 100),
+        "as_of": closes.index[-1],
+    }
+    for years in CAGR_WINDOWS_YEARS:
+        stats[f"cagr_{years}y_pct"] = trailing_cagr_pct(closes, years)
+    return stats
+
+
+class BenchmarkBoard:
+    """Precomputed stats for a fixed set of benchmark symbols.
+
+    ``refresh`` pulls every symbol through the cache on a thread pool and
+    swaps in the new snapshot in one assignment, so ``stats``/``history``
+    are plain dict lookups. ``start`` runs the first refresh and then keeps
+    refreshing every ``refresh_seconds`` on a daemon thread.
+    """
+
+    def __init__(self, cache: PriceHistoryCache, symbols, refresh_seconds=None, history_years: int = 5,
+                 max_workers: int = 8):
+        self.cache = cache
+        self.symbols = list(dict.fromkeys(symbols))
+        self.refresh_seconds = refresh_seconds or cache.ttl_seconds
+        self.history_years = history_years
+        self.max_workers = max_workers
+        self._snapshot = {}
+        self._ready = threading.Event()
+        self._thread = None
+        self._started_at = None
+
+    def _load(self, symbol):
+        full = self.cache.history(symbol)
+        if full.empty:
+            return symbol, None
+        recent = full[full.index >= full.index[-1] - pd.DateOffset(years=self.history_years)]
+        return symbol, {"stats": benchmark_stats(full), "history": recent}
+
+    def refresh(self) -> None:
+        """Refetch every symbol concurrently and publish a new snapshot."""
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(len(self.symbols), 1))) as pool:
+            loaded = dict(pool.map(self._load, self.symbols))
+        snapshot = dict(self._snapshot)
+        snapshot.update({s: entry for s, entry in loaded.items() if entry is not None})
+        self._snapshot = snapshot
+        self._ready.set()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                self._ready.set()
+            time.sleep(self.refresh_seconds)
+
+    def start(self) -> "BenchmarkBoard":
+        """Start the background refresh loop (idempotent)."""
+        if self._thread is None:
+            self._started_at = time.monotonic()
+            self._thread = threading.Thread(target=self._run, name="benchmark-board", daemon=True)
+            self._thread.start()
+        return self
+
+    def wait_ready(self, timeout=None) -> bool:
+        """Block until the first refresh has finished (or ``timeout`` seconds pass)."""
+        return self._ready.wait(timeout)
+
+    def status(self, timeout_seconds: float = DEFAULT_FETCH_TIMEOUT_SECONDS) -> str:
+        """``"ready"`` after the first refresh, else ``"pending"`` or ``"timeout"`` (never blocks)."""
+        if self._ready.is_set():
+            return "ready"
+        if self._started_at is not None and time.monotonic() - self._started_at > timeout_seconds:
+            return "timeout"
+        return "pending"
+
+    def stats(self, symbol: str) -> dict:
+        """Precomputed stats for ``symbol`` ({} when unknown or not loaded yet)."""
+        entry = self._snapshot.get(symbol)
+        return entry["stats"] if entry else {}
+
+    def history(self, symbol: str):
+        """Trailing ``history_years`` of daily closes for ``symbol`` (None when not loaded)."""
+        entry = self._snapshot.get(symbol)
+        return entry["history"] if entry else None
+
+    def table(self) -> pd.DataFrame:
+        """One row per loaded symbol with its price, daily change and CAGRs."""
+        rows = [{"Symbol": s, **self.stats(s)} for s in self.symbols if s in self._snapshot]
+        return pd.DataFrame(rows)
+
+
+# ── Risk statistics ───────────────────────────────────────────────────────────
+def risk_statistics(closes: pd.Series, risk_free_annual_pct: float = 0.0) -> dict:
+    """Volatility, drawdown, Sharpe/Sortino and rolling-return stats for a daily close Series.
+
+    Everything is derived from a few shared arrays built once: the log
+    prices, the daily returns, their running peak and the month-end log
+    prices. Each metric is then a reduction over one of them, so adding a
+    metric adds no pass over the raw history. ``rolling_cagr`` holds the
+    distribution of the CAGR over every whole-year window length the
+    history covers. Returns {} with fewer than two closes.
+    """
+    closes = closes.dropna()
+    closes = closes[closes > 0]
+    if len(closes) < 2:
+        return {}
+    dates = closes.index
+    prices = closes.to_numpy(dtype=float)
+    log_prices = np.log(prices)
+    returns = np.expm1(np.diff(log_prices))
+    span_years = (dates[-1] - dates[0]).days / 365.25
+    periods_per_year = len(returns) / span_years if span_years > 0 else 252.0
+
+    rf_period = (1 + risk_free_annual_pct / 100) ** (1 / periods_per_year) - 1
+    excess = returns - rf_period
+    volatility = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    downside = np.sqrt(np.mean(np.minimum(excess, 0.0) ** 2))
+    mean_excess_annual = excess.mean() * periods_per_year
+
+    peaks = np.maximum.accumulate(log_prices)
+    drawdowns = 1 - np.exp(log_prices - peaks)
+    trough = int(drawdowns.argmax())
+    peak = int(np.flatnonzero(log_prices[:trough + 1] == peaks[trough])[0])
+    recovered_at = np.flatnonzero(log_prices[trough:] >= peaks[trough])
+    recovery = trough + int(recovered_at[0]) if len(recovered_at) else None
+    underwater_end = dates[recovery] if recovery is not None else dates[-1]
+
+    month_end = np.log(closes.resample("ME").last().dropna().to_numpy(dtype=float))
+    rolling_12m = np.expm1(month_end[12:] - month_end[:-12])
+    rolling_cagr = []
+    for window_years in range(1, (len(month_end) - 1) // 12 + 1):
+        window = 12 * window_years
+        cagrs = np.expm1((month_end[window:] - month_end[:-window]) / window_years) * 100
+        rolling_cagr.append({
+            "window_years": window_years, "windows": len(cagrs), "min": cagrs.min(),
+            "p25": np.percentile(cagrs, 25), "median": np.median(cagrs),
+            "p75": np.percentile(cagrs, 75), "max": cagrs.max(),
+        })
+
+    return {
+        "as_of": dates[-1],
+        "volatility_pct": float(volatility * np.sqrt(periods_per_year) * 100),
+        "sharpe": float(mean_excess_annual / (volatility * np.sqrt(periods_per_year))) if volatility > 0 else None,
+        "sortino": float(mean_excess_annual / (downside * np.sqrt(periods_per_year))) if downside > 0 else None,
+        "max_drawdown_pct": float(drawdowns[trough] * 100),
+        "drawdown_peak": dates[peak],
+        "drawdown_trough": dates[trough],
+        "drawdown_recovered": recovery is not None,
+        "drawdown_days": int((underwater_end - dates[peak]).days),
+        "worst_12m_return_pct": float(rolling_12m.min() * 100) if len(rolling_12m) else None,
+        "rolling_cagr": pd.DataFrame(rolling_cagr, columns=["window_years", "windows", "min", "p25", "median", "p75", "max"]),
+    }
@@ -0,0 +1,218 @@
+"""Investment pitch generation for the AI Wealth Simulator: prompt, streaming clients and latency."""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+DEFAULT_MODEL = "gemini-flash-latest"
+LATENCY_LOG_SIZE = 100
+DEFAULT_CACHE_DIR = os.path.join(".cache", "pitches")
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 500
+
+
+# ── Prompt ────────────────────────────────────────────────────────────────────
+def build_pitch_prompt(years, base_monthly_contribution, nominal_annual_return_pct, annual_devaluation_pct,
+                       total_contrib, final_nominal, final_real) -> str:
+    """The three-paragraph executive-summary prompt for one projection."""
+    return f"""
+You are a highly professional, expert financial advisor creating a pitch for a high-net-worth client.
+The client is considering an investment plan with the following metrics:
+- Duration: {years} years
+- Base Monthly Contribution: {base_monthly_contribution}
+- Expected Annual Return: {nominal_annual_return_pct}%
+- Expected Inflation/Devaluation: {annual_devaluation_pct}%
+- Total Contributed over {years} years: {total_contrib:,.0f}
+- Final Projected Value (Nominal): {final_nominal:,.0f}
+- Final Projected Value (Purchasing Power Adjusted): {final_real:,.0f}
+
+Write a concise, compelling 3-paragraph executive summary to sell this investment strategy.
+- Paragraph 1: Highlight the sheer growth and the magic of compounding based on these numbers.
+- Paragraph 2: Address the inflation/devaluation factor gracefully, showing that even after adjusting for a {annual_devaluation_pct}% drop in purchasing power, the real value still makes it a sound investment.
+- Paragraph 3: A strong call to action.
+Use professional formatting (bolding, maybe a bullet or two). Do not use placeholders. Tone should be premium, authoritative, and inspiring.
+"""
+
+
+# ── Clients ───────────────────────────────────────────────────────────────────
+class PitchAPIError(Exception):
+    """A retryable API failure (HTTP 429 or 5xx); ``retry_after`` is the server's hint in seconds, if any."""
+
+    def __init__(self, status: int, message: str = "", retry_after=None):
+        super().__init__(f"HTTP {status}: {message}" if message else f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class GeminiPitchClient:
+    """Gemini pitch client: ``stream`` yields text chunks, ``generate`` awaits the whole pitch."""
+
+    def __init__(self, api_key: str, model_name: str = DEFAULT_MODEL):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self._model = genai.GenerativeModel(model_name)
+
+    def stream(self, prompt: str):
+        for chunk in self._model.generate_content(prompt, stream=True):
+            if chunk.text:
+                yield chunk.text
+
+    async def generate(self, prompt: str) -> str:
+        try:
+            response = await self._model.generate_content_async(prompt)
+        except Exception as e:
+            # google.api_core errors carry the HTTP status as ``code``.
+            status = getattr(e, "code", None)
+            if isinstance(status, int) and (status == 429 or status >= 500):
+                raise PitchAPIError(status, str(e)) from e
+            raise
+        return response.text
+
+
+class FakePitchClient:
+    """Offline stand-in for ``GeminiPitchClient`` that streams a canned pitch.
+
+    Waits ``first_chunk_delay`` seconds before the first chunk and
+    ``chunk_delay`` between the rest, each ``words_per_chunk`` words long.
+    """
+
+    model_name = "fake-pitch-model"
+    TEXT = (
+        "**Compounding at work.** Steady monthly contributions, left to grow year after year, turn a disciplined "
+        "habit into a substantial portfolio, with returns earning returns of their own.\n\n"
+        "**Protected purchasing power.** Even after discounting every future value for inflation, the plan "
+        "still ends well ahead of what was put in, so the growth is real and not just a bigger number.\n\n"
+        "**Your next step.** The best time to start was yesterday; the next best is today. Let's put this plan "
+        "to work."
+    )
+
+    def __init__(self, first_chunk_delay: float = 0.5, chunk_delay: float = 0.05, words_per_chunk: int = 3,
+                 text: str = None):
+        self.first_chunk_delay = first_chunk_delay
+        self.chunk_delay = chunk_delay
+        self.words_per_chunk = words_per_chunk
+        self.text = text or self.TEXT
+
+    def stream(self, prompt: str):
+        words = self.text.split(" ")
+        for i in range(0, len(words), self.words_per_chunk):
+            time.sleep(self.first_chunk_delay if i == 0 else self.chunk_delay)
+            yield " ".join(words[i:i + self.words_per_chunk]) + (" " if i + self.words_per_chunk < len(words) else "")
+
+
+def default_pitch_client(api_key=None):
+    """Fake client when ``PITCH_FAKE_CLIENT`` is set, Gemini otherwise.
+
+    ``PITCH_FAKE_FIRST_DELAY`` and ``PITCH_FAKE_CHUNK_DELAY`` (seconds) tune
+    the fake client's pacing.
+    """
+    if os.environ.get("PITCH_FAKE_CLIENT"):
+        return FakePitchClient(float(os.environ.get("PITCH_FAKE_FIRST_DELAY", 0.5)),
+                               float(os.environ.get("PITCH_FAKE_CHUNK_DELAY", 0.05)))
+    if not api_key:
+        raise ValueError("A Gemini API key is required.")
+    return GeminiPitchClient(api_key)
+
+
+# ── Cache ─────────────────────────────────────────────────────────────────────
+def pitch_cache_key(prompt: str, model_name: str) -> str:
+    """Content address of a pitch: SHA-256 of the model name and the rendered prompt."""
+    return hashlib.sha256(f"{model_name}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+class PitchCache:
+    """SQLite-backed store of generated pitches keyed by ``pitch_cache_key``.
+
+    Entries expire ``ttl_seconds`` after they were generated. Once more
+    than ``max_entries`` are stored, the least recently used are evicted.
+    ``hits`` and ``misses`` count lookups since the cache was opened.
+    """
+
+    def __init__(self, directory=None, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.directory = directory or os.environ.get("PITCH_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, "pitches.sqlite3")
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS pitches ("
+                         "key TEXT PRIMARY KEY, model TEXT NOT NULL, text TEXT NOT NULL, "
+                         "created_at REAL NOT NULL, used_at REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS pitches_used_at ON pitches (used_at)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: str):
+        """The cached pitch text for ``key``, or None when missing or expired."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT text FROM pitches WHERE key = ? AND created_at > ?",
+                               (key, now - self.ttl_seconds)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE pitches SET used_at = ? WHERE key = ?", (now, key))
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, model_name: str, text: str) -> None:
+        """Store a pitch, then drop expired entries and anything beyond ``max_entries``."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO pitches (key, model, text, created_at, used_at) "
+                         "VALUES (?, ?, ?, ?, ?)", (key, model_name, text, now, now))
+            conn.execute("DELETE FROM pitches WHERE created_at <= ?", (now - self.ttl_seconds,))
+            conn.execute("DELETE FROM pitches WHERE key NOT IN "
+                         "(SELECT key FROM pitches ORDER BY used_at DESC LIMIT ?)", (self.max_entries,))
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM pitches").fetchone()[0]
+
+
+# ── Latency ───────────────────────────────────────────────────────────────────
+LATENCY_LOG = deque(maxlen=LATENCY_LOG_SIZE)
+
+
+class TimedStream:
+    """Wraps a chunk iterator and records time-to-first-chunk and total latency.
+
+    Iterate it (e.g. with ``st.write_stream``) to pass the chunks through.
+    Once exhausted, ``text`` holds the whole response and a record is
+    appended to ``LATENCY_LOG``.
+    """
+
+    def __init__(self, chunks, model_name: str):
+        self._chunks = chunks
+        self.model_name = model_name
+        self.first_chunk_s = None
+        self.total_s = None
+        self.text = ""
+
+    def __iter__(self):
+        started = time.perf_counter()
+        parts = []
+        for chunk in self._chunks:
+            if self.first_chunk_s is None:
+                self.first_chunk_s = time.perf_counter() - started
+            parts.append(chunk)
+            yield chunk
+        self.total_s = time.perf_counter() - started
+        self.text = "".join(parts)
+        LATENCY_LOG.append({
+            "model": self.model_name,
+            "first_chunk_s": self.first_chunk_s,
+            "total_s": self.total_s,
+            "chars": len(self.text),
+            "at": time.time(),
+        })
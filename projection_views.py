@@ -0,0 +1,222 @@
+"""Figures and tables for the AI Wealth Simulator, as nodes of the projection graph."""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from wealth_engine import MC_PERCENTILES, PROJECTION_GRAPH
+
+MAX_CHART_POINTS = 2_000
+WEBGL_MIN_POINTS = 1_000
+
+
+def decimate_indices(*series, max_points: int = MAX_CHART_POINTS) -> np.ndarray:
+    """Indices that keep each bucket's min and max of every series, plus both endpoints.
+
+    The series share an x axis and are cut into the same equal buckets, so
+    peaks and troughs survive and paired traces (band edges) stay aligned.
+    The result has at most about ``max_points`` indices whatever the length.
+    """
+    n = len(series[0])
+    if n <= max_points:
+        return np.arange(n)
+    buckets = max(1, (max_points - 2) // (2 * len(series)))
+    size = -(-n // buckets)
+    keep = [np.array([0, n - 1])]
+    offsets = np.arange(buckets) * size
+    for y in series:
+        padded = np.full(buckets * size, np.nan)
+        padded[:n] = y
+        padded = padded.reshape(buckets, size)
+        filled = ~np.isnan(padded).all(axis=1)
+        keep.append((offsets + np.nanargmin(np.where(filled[:, None], padded, 0.0), axis=1))[filled])
+        keep.append((offsets + np.nanargmax(np.where(filled[:, None], padded, 0.0), axis=1))[filled])
+    return np.unique(np.concatenate(keep))
+
+
+def _line_trace(x, y, keep=None, **trace_kwargs):
+    """A line trace sent as at most ``MAX_CHART_POINTS`` points, drawn with WebGL for long series."""
+    x, y = np.asarray(x), np.asarray(y, dtype=float)
+    if keep is None:
+        keep = decimate_indices(y)
+    trace = go.Scattergl if len(x) >= WEBGL_MIN_POINTS else go.Scatter
+    return trace(x=x[keep], y=y[keep], **trace_kwargs)
+
+
+@PROJECTION_GRAPH.node("figure", inputs=("lump_sum",), deps=("summary", "mc_bands", "calendar_path"))
+def _growth_figure_node(lump_sum, summary, mc_bands, calendar_path):
+    df = summary["df"]
+    fig = go.Figure()
+    if calendar_path is None:
+        balance_dates, nominal, real = df['date'], df['nominal_balance'], df['real_balance']
+    else:
+        balance_dates = calendar_path["date"]
+        nominal = calendar_path["nominal"]
+        elapsed_months = (balance_dates - df['date'].iloc[0]).days.to_numpy() * 12 / 365.25
+        real = nominal / (1 + summary["deval_monthly"]) ** elapsed_months
+
+    if mc_bands is not None:
+        band_by_pct = dict(zip(MC_PERCENTILES, mc_bands))
+        for lo_pct, hi_pct, fill_color in [(5, 95, 'rgba(255, 152, 0, 0.12)'), (25, 75, 'rgba(255, 152, 0, 0.25)')]:
+            keep = decimate_indices(band_by_pct[lo_pct], band_by_pct[hi_pct])
+            fig.add_trace(_line_trace(
+                df['date'], band_by_pct[hi_pct], keep,
+                mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'
+            ))
+            fig.add_trace(_line_trace(
+                df['date'], band_by_pct[lo_pct], keep,
+                mode='lines', name=f'P{lo_pct}–P{hi_pct} Range', line=dict(width=0),
+                fill='tonexty', fillcolor=fill_color
+            ))
+        fig.add_trace(_line_trace(
+            df['date'], band_by_pct[50],
+            mode='lines', name='Median (P50) Path',
+            line=dict(color='#FF9800', width=2, dash='dash')
+        ))
+
+    # Create a clean, modern chart
+    fig.add_trace(_line_trace(
+        balance_dates, nominal,
+        mode='lines', name='Nominal Balance',
+        line=dict(color='#4CAF50', width=3),
+        fill='tozeroy', fillcolor='rgba(76, 175, 80, 0.1)'
+    ))
+
+    fig.add_trace(_line_trace(
+        balance_dates, real,
+        mode='lines', name='Real (Inflation-Adj) Balance',
+        line=dict(color='#03A9F4', width=3, dash='dot')
+    ))
+
+    fig.add_trace(_line_trace(
+        df['date'], df['contribution'].cumsum() + df['extra_lump'].cumsum() + lump_sum,
+        mode='lines', name='Total Contributions',
+        line=dict(color='#9E9E9E', width=2)
+    ))
+
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(showgrid=False),
+        yaxis=dict(showgrid=True, gridcolor='rgba(128,128,128,0.2)'),
+        hovermode='x unified',
+        margin=dict(l=0, r=0, t=20, b=0),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return fig
+
+
+@PROJECTION_GRAPH.node("ledger", deps=("summary",))
+def _ledger_node(summary):
+    return summary["df"][["date", "contribution", "extra_lump", "nominal_balance", "real_balance"]]
+
+
+@PROJECTION_GRAPH.node("step_ledger", deps=("summary", "calendar_path"))
+def _step_ledger_node(summary, calendar_path):
+    if calendar_path is None:
+        return None
+    dates = calendar_path["date"]
+    elapsed_months = (dates - summary["df"]["date"].iloc[0]).days.to_numpy() * 12 / 365.25
+    return pd.DataFrame({
+        "date": dates,
+        "nominal_balance": calendar_path["nominal"],
+        "real_balance": calendar_path["nominal"] / (1 + summary["deval_monthly"]) ** elapsed_months,
+    })
+
+
+def sweep_heatmap_figure(annual_returns_pct, contribution_levels, values, value_label):
+    """Heatmap of final value over expected return (x) and monthly contribution (y)."""
+    fig = go.Figure(go.Heatmap(
+        x=annual_returns_pct, y=contribution_levels, z=values.T,
+        colorscale='Viridis', colorbar=dict(title=value_label),
+        hovertemplate='Return %{x:.2f}%<br>Contribution %{y:,.0f}<br>' + value_label + ' %{z:,.0f}<extra></extra>'
+    ))
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(title='Expected Nominal Annual Return (%)'),
+        yaxis=dict(title='Base Monthly Contribution'),
+        margin=dict(l=0, r=0, t=20, b=0)
+    )
+    return fig
+
+
+def backtest_figure(backtest):
+    """Terminal balance of the plan by historical start month."""
+    fig = go.Figure(go.Scatter(
+        x=backtest['start'], y=backtest['terminal'],
+        mode='lines', name='Terminal Balance',
+        line=dict(color='#4CAF50', width=2),
+        customdata=backtest['max_drawdown_pct'],
+        hovertemplate='Start %{x|%b %Y}<br>Terminal %{y:,.0f}<br>Max drawdown %{customdata:.1f}%<extra></extra>'
+    ))
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(showgrid=False, title='Start Month'),
+        yaxis=dict(showgrid=True, gridcolor='rgba(128,128,128,0.2)', title='Terminal Balance'),
+        margin=dict(l=0, r=0, t=20, b=0)
+    )
+    return fig
+
+
+def terminal_distribution_figure(terminal_values):
+    """Histogram of simulated terminal portfolio values."""
+    fig = go.Figure(go.Histogram(
+        x=terminal_values, nbinsx=80,
+        marker_color='rgba(76, 175, 80, 0.6)',
+        hovertemplate='Terminal %{x:,.0f}<br>Paths %{y}<extra></extra>'
+    ))
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(showgrid=False, title='Terminal Portfolio Value'),
+        yaxis=dict(showgrid=True, gridcolor='rgba(128,128,128,0.2)', title='Paths'),
+        bargap=0.02,
+        margin=dict(l=0, r=0, t=20, b=0)
+    )
+    return fig
+
+
+def drawdown_figure(balances):
+    """Median and P5–P95 band of the balance (months x paths) through retirement."""
+    years = np.arange(1, len(balances) + 1) / 12
+    p5, p50, p95 = np.percentile(balances, [5, 50, 95], axis=1)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=years, y=p95, mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'))
+    fig.add_trace(go.Scatter(
+        x=years, y=p5, name='P5–P95', mode='lines', line=dict(width=0),
+        fill='tonexty', fillcolor='rgba(255, 152, 0, 0.2)', hoverinfo='skip'
+    ))
+    fig.add_trace(go.Scatter(
+        x=years, y=p50, name='Median Balance', mode='lines', line=dict(color='#FF9800', width=3),
+        hovertemplate='Year %{x:.1f}<br>%{y:,.0f}<extra></extra>'
+    ))
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(showgrid=False, title='Years into Retirement'),
+        yaxis=dict(showgrid=True, gridcolor='rgba(128,128,128,0.2)', title='Balance'),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(l=0, r=0, t=20, b=0)
+    )
+    return fig
+
+
+def growth_projection_figure(inputs, mc_settings=None):
+    """Growth Projection chart for a plan.
+
+    ``mc_settings`` is (model, volatility, paths, seed, history) as taken by
+    ``monte_carlo_bands``, or None for no bands. The figure is shared
+    between reruns, so do not mutate it.
+    """
+    return PROJECTION_GRAPH.evaluate("figure", {**inputs._asdict(), "mc_settings": mc_settings})
+
+
+def monthly_ledger(inputs):
+    """Detailed Monthly Ledger for a plan as plain typed columns (shared; do not mutate)."""
+    return PROJECTION_GRAPH.evaluate("ledger", inputs._asdict())
+
+
+def step_ledger(inputs):
+    """Balance after every daily or weekly compounding step, or None for monthly plans (shared; do not mutate)."""
+    return PROJECTION_GRAPH.evaluate("step_ledger", inputs._asdict())
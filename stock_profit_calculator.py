@@ -6,10 +6,18 @@ import numpy as np
 import pandas as pd
 import streamlit as st
 import plotly.express as px
-import plotly.graph_objects as go
-import yfinance as yf
-import google.generativeai as genai
 from datetime import datetime
+from market_data import BackgroundFetcher, BenchmarkBoard, PriceHistoryCache, benchmark_stats, risk_statistics, trailing_cagr_pct
+from pitch_ai import PitchCache, TimedStream, build_pitch_prompt, default_pitch_client, pitch_cache_key
+from projection_views import (
+    backtest_figure, drawdown_figure, growth_projection_figure, monthly_ledger, step_ledger, sweep_heatmap_figure,
+    terminal_distribution_figure,
+)
+from wealth_engine import (
+    DrawdownSimulation, ProjectionInputs, aligned_monthly_returns, bootstrap_asset_sampler, bootstrap_sampler,
+    lognormal_asset_sampler, lognormal_sampler, monthly_return_series, monthly_returns_from_history, rolling_backtest, run_projection,
+    simulate_portfolio, solve_minimum_years, solve_required_contribution, solve_required_return, sweep_plan,
+)
 
 st.set_page_config(page_title="AI Wealth Simulator", layout="wide", page_icon="📈")
 
@@ -64,6 +72,77 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+TICKER_OPTIONS = {
+    "S&P 500 (US Market)": "SPY",
+    "KSE-100 (Pakistan Market)": "^KSE",
+    "NASDAQ 100 (Tech Stocks)": "QQQ",
+    "Bitcoin (Crypto)": "BTC-USD",
+    "Gold (Commodity)": "GC=F",
+    "Custom Symbol": "CUSTOM"
+}
+
+LEDGER_PAGE_SIZE = 500
+LEDGER_COLUMN_CONFIG = {
+    "date": st.column_config.DateColumn("Date", format="YYYY-MM-DD"),
+    "contribution": st.column_config.NumberColumn("Contribution", format="%,.0f"),
+    "extra_lump": st.column_config.NumberColumn("Extra Lump", format="%,.0f"),
+    "nominal_balance": st.column_config.NumberColumn("Nominal Balance", format="%,.0f"),
+    "real_balance": st.column_config.NumberColumn("Real Balance", format="%,.0f"),
+}
+
+@st.cache_resource
+def get_price_cache():
+    return PriceHistoryCache()
+
+@st.cache_resource
+def get_benchmark_board():
+    # Built once per server process; refreshes itself in the background.
+    symbols = [s for s in TICKER_OPTIONS.values() if s != "CUSTOM"]
+    return BenchmarkBoard(get_price_cache(), symbols).start()
+
+@st.cache_resource
+def get_background_fetcher():
+    return BackgroundFetcher(get_price_cache())
+
+@st.cache_resource
+def get_pitch_cache():
+    return PitchCache()
+
+@st.cache_resource
+def get_pitch_client(api_key):
+    # One configured client per key, reused by every click.
+    return default_pitch_client(api_key)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def risk_statistics_cached(symbol, as_of, risk_free_pct):
+    # Keyed on the last cached close, so a new trading day computes fresh stats once.
+    return risk_statistics(get_price_cache().stored(symbol, years=5)["Close"], risk_free_pct)
+
+@st.cache_data(max_entries=16, show_spinner="Simulating portfolio paths...")
+def simulate_portfolio_cached(deposits, asset_returns, weights, model, drag_monthly, n_paths, lump_sum, annuity_due, rebalance_months):
+    sampler = (bootstrap_asset_sampler if model == "Bootstrap history" else lognormal_asset_sampler)(asset_returns, drag_monthly)
+    return simulate_portfolio(deposits, sampler, weights, n_paths, lump_sum, annuity_due, rebalance_months, seed=42)
+
+@st.cache_resource(max_entries=4, show_spinner="Simulating retirement paths...")
+def build_drawdown_simulation(deposits, history_returns, nominal_return_pct, volatility_pct, drag_monthly, withdrawal_months, mode, lump_sum, annuity_due, deval_monthly):
+    # Kept as a resource, not data: the path arrays are reused by every solver probe and never copied.
+    if history_returns is not None:
+        sampler = bootstrap_sampler(history_returns, drag_monthly)
+    else:
+        sampler = lognormal_sampler(nominal_return_pct, volatility_pct, drag_monthly)
+    return DrawdownSimulation(deposits, sampler, withdrawal_months, mode, 5_000, lump_sum, annuity_due, deval_monthly, seed=42)
+
+@st.cache_data(max_entries=32, show_spinner="Solving the safe withdrawal...")
+def solve_withdrawal_cached(success_probability, *simulation_args):
+    # Expander bodies run on every rerun; the bisection only reruns when the plan or the target changes.
+    return build_drawdown_simulation(*simulation_args).solve_withdrawal(success_probability)
+
+@st.fragment(run_every=1.0)
+def rerun_when_market_data_arrives(is_pending):
+    # Polls quietly while the fetch runs, then reruns the page with fresh data.
+    if not is_pending():
+        st.rerun()
+
 st.title("📈 AI-Driven Wealth Simulator & Pitch Generator")
 st.markdown("A professional financial projection tool powered by real market data and Generative AI.")
 
@@ -75,14 +154,6 @@ with st.sidebar:
     st.subheader("Market Context (Optional)")
     st.caption("Fetch historical 5-year CAGR to set expected return.")
     
-    TICKER_OPTIONS = {
-        "S&P 500 (US Market)": "SPY",
-        "KSE-100 (Pakistan Market)": "^KSE",
-        "NASDAQ 100 (Tech Stocks)": "QQQ",
-        "Bitcoin (Crypto)": "BTC-USD",
-        "Gold (Commodity)": "GC=F",
-        "Custom Symbol": "CUSTOM"
-    }
     selected_market = st.selectbox("Select Market Benchmark", list(TICKER_OPTIONS.keys()))
     
     if TICKER_OPTIONS[selected_market] == "CUSTOM":
@@ -92,40 +163,98 @@ with st.sidebar:
         
     # Default value
     cagr_pct = 19.85
+    hist_monthly_returns = None
     
     if ticker:
-        with st.spinner("Fetching real-time data..."):
-            try:
-                hist = yf.Ticker(ticker).history(period="5y")
-                if len(hist) > 1:
-                    start_price = hist['Close'].iloc[0]
-                    end_price = hist['Close'].iloc[-1]
-                    start_date = hist.index[0]
-                    end_date = hist.index[-1]
-                    
-                    # Calculate exact years between first and last data point
-                    years_data = (end_date - start_date).days / 365.25
-                    
-                    if years_data > 0:
-                        cagr = ((end_price / start_price) ** (1 / years_data)) - 1
-                        cagr_pct = round(cagr * 100, 2)
-                    else:
-                        cagr_pct = 15.0  # fallback
-                    
-                    # Real-time stats
-                    current_price = hist['Close'].iloc[-1]
-                    if len(hist) > 1:
-                        prev_price = hist['Close'].iloc[-2]
-                        day_change_pct = ((current_price - prev_price) / prev_price) * 100
-                    else:
-                        day_change_pct = 0.0
-                    
-                    st.metric(label=f"{ticker} Current Price", value=f"{current_price:,.2f}", delta=f"{day_change_pct:.2f}% (Daily)")
-                    st.success(f"5-Year CAGR for {ticker}: **{cagr_pct}%**")
-                else:
-                    st.warning("Could not fetch data. Using default 19.85%.")
-            except Exception as e:
-                st.warning("Error fetching ticker. Using default 19.85%.")
+        try:
+            price_cache = get_price_cache()
+            benchmark_board = get_benchmark_board()
+            background_fetcher = get_background_fetcher()
+            # Never wait on the network here: render with the last stored prices
+            # (or the default) and rerun once the background fetch lands.
+            if ticker in benchmark_board.symbols:
+                fetch_status = benchmark_board.status()
+                is_pending = lambda: benchmark_board.status() == "pending"
+            else:
+                fetch_status, _ = background_fetcher.poll(ticker, years=5)
+                is_pending = lambda: background_fetcher.poll(ticker, years=5)[0] == "pending"
+            if fetch_status == "ready" and benchmark_board.stats(ticker):
+                hist = benchmark_board.history(ticker)
+                ticker_stats = benchmark_board.stats(ticker)
+            else:
+                hist = price_cache.stored(ticker, years=5)
+                ticker_stats = benchmark_stats(hist)
+
+            if fetch_status == "pending":
+                st.info("Fetching real-time data in the background...")
+                rerun_when_market_data_arrives(is_pending)
+            elif fetch_status == "timeout":
+                st.warning("Market data is taking too long to load.")
+
+            if len(hist) > 1 and ticker_stats:
+                # Fall back to whatever history exists when it is shorter than 5 years
+                cagr_5y = ticker_stats["cagr_5y_pct"]
+                if cagr_5y is None:
+                    cagr_5y = trailing_cagr_pct(hist['Close'])
+                cagr_pct = round(cagr_5y, 2) if cagr_5y is not None else 15.0
+
+                # Real-time stats
+                current_price = ticker_stats["last_price"]
+                day_change_pct = ticker_stats["day_change_pct"]
+
+                st.metric(label=f"{ticker} Current Price", value=f"{current_price:,.2f}", delta=f"{day_change_pct:.2f}% (Daily)")
+                st.success(f"5-Year CAGR for {ticker}: **{cagr_pct}%**")
+                if fetch_status != "ready" or ticker in price_cache.errors:
+                    st.caption(f"Showing cached prices up to {ticker_stats['as_of']:%Y-%m-%d}.")
+                hist_monthly_returns = monthly_returns_from_history(hist['Close'])
+            elif fetch_status != "pending":
+                st.warning("Could not fetch data. Using default 19.85%.")
+        except Exception as e:
+            st.warning("Error fetching ticker. Using default 19.85%.")
+
+    if hist_monthly_returns is not None:
+        with st.expander("🛡️ Risk Profile"):
+            risk_free_pct = st.number_input("Risk-free Rate (%)", 0.0, 50.0, 0.0, step=0.5, help="Used for the Sharpe and Sortino ratios.")
+            risk = risk_statistics_cached(ticker, ticker_stats["as_of"].strftime("%Y-%m-%d"), float(risk_free_pct))
+            rk1, rk2 = st.columns(2)
+            rk1.metric("Volatility (ann.)", f"{risk['volatility_pct']:.1f}%")
+            rk2.metric("Max Drawdown", f"-{risk['max_drawdown_pct']:.1f}%", f"{risk['drawdown_days']} days{'' if risk['drawdown_recovered'] else ', not recovered'}", delta_color="off")
+            rk1.metric("Sharpe", f"{risk['sharpe']:.2f}" if risk["sharpe"] is not None else "—")
+            rk2.metric("Sortino", f"{risk['sortino']:.2f}" if risk["sortino"] is not None else "—")
+            if risk["worst_12m_return_pct"] is not None:
+                st.caption(f"Worst 12-month return: **{risk['worst_12m_return_pct']:.1f}%**. Deepest drawdown from {risk['drawdown_peak']:%b %Y} to {risk['drawdown_trough']:%b %Y}.")
+            if not risk["rolling_cagr"].empty:
+                st.caption("Rolling CAGR (%) by holding period")
+                st.dataframe(
+                    risk["rolling_cagr"].rename(columns={
+                        "window_years": "Years", "windows": "Windows", "min": "Min",
+                        "p25": "P25", "median": "Median", "p75": "P75", "max": "Max"
+                    }).style.format({"Min": "{:.1f}", "P25": "{:.1f}", "Median": "{:.1f}", "P75": "{:.1f}", "Max": "{:.1f}"}),
+                    hide_index=True,
+                    use_container_width=True
+                )
+
+    with st.expander("📋 Benchmark Snapshot"):
+        snapshot = get_benchmark_board().table()
+        if snapshot.empty:
+            st.caption("Benchmark data is still loading.")
+        else:
+            symbol_names = {v: k for k, v in TICKER_OPTIONS.items()}
+            snapshot.insert(0, "Benchmark", snapshot["Symbol"].map(symbol_names))
+            snapshot = snapshot.drop(columns=["Symbol", "as_of"]).rename(columns={
+                "last_price": "Last Price", "day_change_pct": "Daily %",
+                "cagr_1y_pct": "1Y CAGR %", "cagr_3y_pct": "3Y CAGR %",
+                "cagr_5y_pct": "5Y CAGR %", "cagr_10y_pct": "10Y CAGR %"
+            })
+            st.dataframe(
+                snapshot.style.format({
+                    "Last Price": "{:,.2f}", "Daily %": "{:+.2f}",
+                    "1Y CAGR %": "{:.2f}", "3Y CAGR %": "{:.2f}",
+                    "5Y CAGR %": "{:.2f}", "10Y CAGR %": "{:.2f}"
+                }, na_rep="—"),
+                hide_index=True,
+                use_container_width=True
+            )
 
     st.divider()
 
@@ -133,6 +262,7 @@ with st.sidebar:
     base_monthly_contribution = st.number_input("Base Monthly Contribution", 0, 100_000_000, 100_000, step=10_000, help="The amount you plan to invest every single month.")
     years = st.slider("Duration (years)", 1, 40, 10, help="How many years you will keep investing.")
     annuity_due = st.checkbox("Contribute at month start (Annuity Due)", value=True, help="Check this if you invest at the beginning of the month. Uncheck if at the end.")
+    compounding = st.radio("Compounding", ["Monthly", "Weekly", "Daily"], horizontal=True, help="How often returns compound. Contributions still land on their real calendar dates each month.")
 
     nominal_annual_return_pct = st.number_input("Expected Nominal Annual Return (%)", -100.0, 1000.0, float(cagr_pct), step=0.5, help="The average yearly growth rate you expect from your investments, before inflation.")
     annual_devaluation_pct = st.number_input("Expected Inflation/Devaluation (%)", 0.0, 100.0, 0.0, step=0.5, help="How much the purchasing power of your money decreases each year (e.g., inflation).")
@@ -145,6 +275,19 @@ with st.sidebar:
     months_list = ["January","February","March","April","May","June","July","August","September","October","November","December"]
     anchor_month = st.selectbox("Anchor Month (for step-ups)", options=months_list, index=0, help="The month of the year when your 'Annual Step-up' takes effect.")
 
+    st.divider()
+    st.subheader("🎲 Monte Carlo")
+    use_monte_carlo = st.checkbox("Show percentile bands", value=False, help="Simulate thousands of random return paths and shade the P5–P95 range on the Growth Projection chart.")
+    if use_monte_carlo:
+        mc_model = st.radio("Return model", ["Bootstrap history", "Log-normal"], horizontal=True, help="Bootstrap redraws the benchmark's actual monthly returns; Log-normal draws around the expected return above.")
+        if hist_monthly_returns is not None and len(hist_monthly_returns) > 1:
+            default_vol = float(np.std(hist_monthly_returns, ddof=1) * np.sqrt(12) * 100)
+        else:
+            default_vol = 15.0
+        mc_volatility_pct = st.number_input("Annual Volatility (%)", 0.0, 200.0, round(default_vol, 1), step=1.0, help="Used by the Log-normal model only.")
+        mc_paths = st.select_slider("Simulated Paths", options=[1_000, 5_000, 10_000, 25_000, 50_000], value=10_000)
+        mc_seed = st.number_input("Random Seed", 0, 2**31 - 1, 42, step=1, help="Same seed, same bands.")
+
     st.divider()
     st.subheader("🤖 AI Settings")
     st.caption("Our internal Magical AI Engine is initialized.")
@@ -163,63 +306,48 @@ with st.expander("🗓️ Advanced Monthly Customization"):
     use_monthly_customization = st.checkbox("Enable custom monthly pattern", value=False)
 
 # --- Calculations ---
-def eff_monthly_rate_from_annual(annual_pct):
-    return (1 + annual_pct/100.0) ** (1/12) - 1
-
-gross_monthly = eff_monthly_rate_from_annual(nominal_annual_return_pct)
-drag_monthly = eff_monthly_rate_from_annual(annual_fee_tax_drag_pct)
-net_nominal_monthly = (1 + gross_monthly) / (1 + drag_monthly) - 1
-deval_monthly = eff_monthly_rate_from_annual(annual_devaluation_pct)
-
-dates = pd.date_range(datetime.today().strftime('%Y-%m-01'), periods=months, freq="MS")
-df = pd.DataFrame({"date": dates})
-df["month_index"] = np.arange(len(df))
-df["month_num_in_year"] = df["date"].dt.month - 1
-
+# The whole pipeline is a pure function of these inputs, memoized across reruns.
 if use_monthly_customization:
     contrib_map = dict(zip(pattern_df["Month"], pattern_df["Contribution"]))
     extra_map = dict(zip(pattern_df["Month"], pattern_df["Extra Lump"]))
-    df["contribution"] = df["month_num_in_year"].map(lambda i: contrib_map[months_list[i]])
-    df["extra_lump"] = df["month_num_in_year"].map(lambda i: extra_map[months_list[i]])
+    monthly_pattern = tuple((float(contrib_map[m]), float(extra_map[m])) for m in months_list)
 else:
-    df["contribution"] = base_monthly_contribution
-    df["extra_lump"] = 0.0
-
-if step_up_pct > 0:
-    is_anchor = (df["month_num_in_year"] == anchor_index)
-    step_factor = np.ones(len(df))
-    cum = 1.0
-    for i in range(len(df)):
-        if is_anchor.iloc[i] and i != 0:
-            cum *= (1 + step_up_pct/100.0)
-        step_factor[i] = cum
-    df["contribution"] = df["contribution"] * step_factor
-
-def simulate_series(contribution_series, extra_series, lump_sum=0, monthly_rate=0.01, annuity_due=True):
-    balance = 0.0
-    balances = []
-    for i, (c, x) in enumerate(zip(contribution_series, extra_series)):
-        if i == 0 and lump_sum > 0:
-            balance += lump_sum
-        if annuity_due:
-            balance += c + x
-            balance *= (1 + monthly_rate)
-        else:
-            balance *= (1 + monthly_rate)
-            balance += c + x
-        balances.append(balance)
-    return np.array(balances)
+    monthly_pattern = None
 
-df["nominal_balance"] = simulate_series(df["contribution"].values, df["extra_lump"].values, lump_sum, net_nominal_monthly, annuity_due)
-discount_factors = (1 + deval_monthly) ** (df["month_index"] + 1)
-df["real_balance"] = df["nominal_balance"] / discount_factors
+projection_inputs = ProjectionInputs(
+    start=datetime.today().strftime('%Y-%m-01'),
+    years=years,
+    base_monthly_contribution=float(base_monthly_contribution),
+    annuity_due=annuity_due,
+    nominal_annual_return_pct=float(nominal_annual_return_pct),
+    annual_devaluation_pct=float(annual_devaluation_pct),
+    annual_fee_tax_drag_pct=float(annual_fee_tax_drag_pct),
+    step_up_pct=float(step_up_pct),
+    lump_sum=float(lump_sum),
+    anchor_index=anchor_index,
+    pattern=monthly_pattern,
+    granularity=compounding.lower(),
+)
+projection = run_projection(projection_inputs)
+df = projection["df"]
+projection_cache = run_projection.cache_info()
+st.sidebar.caption(f"⚡ Projection cache: {projection_cache.hits} hits · {projection_cache.misses} misses")
+
+mc_settings = None
+if use_monte_carlo:
+    if mc_model == "Bootstrap history" and hist_monthly_returns is not None and len(hist_monthly_returns) > 0:
+        mc_settings = ("bootstrap", 0.0, mc_paths, int(mc_seed), tuple(hist_monthly_returns))
+    else:
+        if mc_model == "Bootstrap history":
+            st.warning("No market history available to bootstrap from. Using the Log-normal model instead.")
+        mc_settings = ("lognormal", float(mc_volatility_pct), mc_paths, int(mc_seed), None)
 
 # --- Summary Metrics ---
-final_nominal = df["nominal_balance"].iloc[-1]
-final_real = df["real_balance"].iloc[-1]
-total_contrib = df["contribution"].sum() + df["extra_lump"].sum() + lump_sum
-gain_nominal = final_nominal - total_contrib
-gain_real = final_real - (total_contrib / ((1 + deval_monthly) ** months))
+final_nominal = projection["final_nominal"]
+final_real = projection["final_real"]
+total_contrib = projection["total_contrib"]
+gain_nominal = projection["gain_nominal"]
+gain_real = projection["gain_real"]
 
 def format_currency(val):
     return f"{val:,.0f}"
@@ -232,45 +360,180 @@ col4.markdown(f'<div class="metric-card"><div class="metric-title">Nominal Gain<
 
 # --- Visualization ---
 st.subheader("📊 Growth Projection")
-fig = go.Figure()
-
-# Create a clean, modern chart
-fig.add_trace(go.Scatter(
-    x=df['date'], y=df['nominal_balance'], 
-    mode='lines', name='Nominal Balance', 
-    line=dict(color='#4CAF50', width=3), 
-    fill='tozeroy', fillcolor='rgba(76, 175, 80, 0.1)'
-))
-
-fig.add_trace(go.Scatter(
-    x=df['date'], y=df['real_balance'], 
-    mode='lines', name='Real (Inflation-Adj) Balance', 
-    line=dict(color='#03A9F4', width=3, dash='dot')
-))
-
-fig.add_trace(go.Scatter(
-    x=df['date'], y=df['contribution'].cumsum() + df['extra_lump'].cumsum() + lump_sum, 
-    mode='lines', name='Total Contributions', 
-    line=dict(color='#9E9E9E', width=2)
-))
-
-fig.update_layout(
-    plot_bgcolor='rgba(0,0,0,0)',
-    paper_bgcolor='rgba(0,0,0,0)',
-    xaxis=dict(showgrid=False),
-    yaxis=dict(showgrid=True, gridcolor='rgba(128,128,128,0.2)'),
-    hovermode='x unified',
-    margin=dict(l=0, r=0, t=20, b=0),
-    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-)
+fig = growth_projection_figure(projection_inputs, mc_settings)
 st.plotly_chart(fig, use_container_width=True)
 
+# --- Sensitivity Sweep ---
+with st.expander("🧮 Sensitivity Sweep (Return × Contribution × Years)"):
+    st.caption("Final value for every combination on the grid, computed in one vectorized pass.")
+    sw1, sw2, sw3 = st.columns(3)
+    sweep_return_range = sw1.slider("Return range (%)", -20.0, 60.0, (0.0, float(min(60, max(1, round(2 * nominal_annual_return_pct))))), step=0.5)
+    sweep_contrib_max = max(int(2 * base_monthly_contribution), 10_000)
+    sweep_contrib_range = sw2.slider("Contribution range", 0, sweep_contrib_max, (int(base_monthly_contribution // 2), sweep_contrib_max), step=max(sweep_contrib_max // 100, 1))
+    sweep_points = sw3.select_slider("Grid points per axis", options=[20, 50, 100, 200], value=100)
+    sweep_returns = np.linspace(*sweep_return_range, sweep_points)
+    sweep_levels = np.linspace(*sweep_contrib_range, sweep_points)
+    sweep_years = np.arange(1, 41)
+    sweep = sweep_plan(projection_inputs, sweep_returns, sweep_levels, sweep_years)
+
+    sw4, sw5 = st.columns(2)
+    sweep_duration = sw4.slider("Show duration (years)", 1, 40, years)
+    sweep_value = sw5.radio("Value", ["Nominal", "Real"], horizontal=True)
+    st.plotly_chart(
+        sweep_heatmap_figure(sweep_returns, sweep_levels, sweep[sweep_value.lower()][:, :, sweep_duration - 1], f"Final {sweep_value}"),
+        use_container_width=True
+    )
+
+# --- Goal Seek ---
+with st.expander("🎯 Goal Seek"):
+    st.caption("Work backwards from a target: what would it take to get there?")
+    gs1, gs2, gs3 = st.columns(3)
+    goal_target = gs1.number_input("Target Final Value", 0.0, 1e13, float(round(max(final_nominal, 1.0) * 2, -3)), step=100_000.0)
+    goal_basis = gs2.radio("Target is", ["Nominal", "Real (Inflation-Adj)"], horizontal=True)
+    goal_solve_for = gs3.radio("Solve for", ["Monthly Contribution", "Annual Return", "Years"])
+    goal_real = goal_basis != "Nominal"
+
+    if goal_solve_for == "Monthly Contribution":
+        required = solve_required_contribution(projection_inputs, goal_target, goal_real)
+        if required is None:
+            st.warning("Contributions cannot reach this target with the current return and fees.")
+        elif use_monthly_customization:
+            st.success(f"Scale your custom monthly contributions by **{required:,.2f}×** to reach {format_currency(goal_target)} in {years} years.")
+        else:
+            st.success(f"Required base monthly contribution: **{format_currency(required)}** for {years} years.")
+    elif goal_solve_for == "Annual Return":
+        required = solve_required_return(projection_inputs, goal_target, goal_real)
+        if required is None:
+            st.warning("No return between -99% and 1000% reaches this target.")
+        else:
+            st.success(f"Required expected nominal annual return: **{required:.2f}%** over {years} years.")
+    else:
+        required = solve_minimum_years(projection_inputs, goal_target, goal_real)
+        if required is None:
+            st.warning("This target is not reached within 40 years.")
+        else:
+            st.success(f"Target reached after **{required} years**.")
+
+# --- Historical Backtest ---
+with st.expander("⏪ Historical Backtest"):
+    full_hist = get_price_cache().stored(ticker) if ticker else None
+    if full_hist is None or full_hist.empty:
+        st.caption("Select a market benchmark with price history to replay this plan against it.")
+    else:
+        backtest = rolling_backtest(
+            monthly_return_series(full_hist['Close']), df["contribution"].values + df["extra_lump"].values,
+            lump_sum, annuity_due, projection["drag_monthly"]
+        )
+        if backtest.empty:
+            history_years = (full_hist.index[-1] - full_hist.index[0]).days / 365.25
+            st.info(f"{ticker} has about {history_years:.1f} years of cached history, not enough for a {years}-year plan. Try a shorter duration.")
+        else:
+            best = backtest.loc[backtest["terminal"].idxmax()]
+            worst = backtest.loc[backtest["terminal"].idxmin()]
+            st.caption(f"Your contribution schedule replayed on actual {ticker} monthly returns from every start month since {backtest['start'].iloc[0]:%b %Y} ({len(backtest)} rolling {years}-year windows).")
+            bt1, bt2, bt3, bt4 = st.columns(4)
+            bt1.metric("Best Outcome", format_currency(best["terminal"]), f"Start {best['start']:%b %Y}", delta_color="off")
+            bt2.metric("Median Outcome", format_currency(backtest["terminal"].median()))
+            bt3.metric("Worst Outcome", format_currency(worst["terminal"]), f"Start {worst['start']:%b %Y}", delta_color="off")
+            bt4.metric("Worst Drawdown", f"{backtest['max_drawdown_pct'].max():.1f}%")
+            st.plotly_chart(backtest_figure(backtest), use_container_width=True)
+
+# --- Multi-Asset Portfolio ---
+with st.expander("🧺 Multi-Asset Portfolio"):
+    st.caption("Split this plan across several benchmarks with target weights and simulate rebalancing on their joint return history.")
+    builtin_markets = {name: symbol for name, symbol in TICKER_OPTIONS.items() if symbol != "CUSTOM"}
+    portfolio_weights = st.data_editor(
+        pd.DataFrame({
+            "Holding": list(builtin_markets.keys()),
+            "Weight (%)": [40.0, 10.0, 30.0, 0.0, 20.0][:len(builtin_markets)]
+        }),
+        disabled=["Holding"], hide_index=True, use_container_width=True
+    )
+    pf1, pf2, pf3 = st.columns(3)
+    rebalance_choice = pf1.radio("Rebalance", ["Monthly", "Annually", "Never"], index=1, horizontal=True)
+    portfolio_model = pf2.radio("Return model", ["Bootstrap history", "Correlated log-normal"], horizontal=True)
+    portfolio_paths = pf3.select_slider("Paths", options=[1_000, 5_000, 10_000, 25_000], value=10_000)
+
+    held = portfolio_weights[portfolio_weights["Weight (%)"] > 0]
+    held_symbols = [builtin_markets[name] for name in held["Holding"]]
+    held_closes = {}
+    for symbol in held_symbols:
+        symbol_hist = get_price_cache().stored(symbol)
+        if len(symbol_hist) > 1:
+            held_closes[symbol] = symbol_hist["Close"]
+    if not held_symbols:
+        st.caption("Give at least one holding a positive weight.")
+    elif len(held_closes) < len(held_symbols):
+        missing = ", ".join(sorted(set(held_symbols) - set(held_closes)))
+        st.info(f"No cached price history yet for: {missing}.")
+    else:
+        asset_returns = aligned_monthly_returns(held_closes)
+        if len(asset_returns) < 2:
+            st.info("The selected holdings do not share enough monthly history.")
+        else:
+            terminal_values = simulate_portfolio_cached(
+                df["contribution"].values + df["extra_lump"].values, asset_returns[held_symbols].values,
+                held["Weight (%)"].values, portfolio_model, projection["drag_monthly"],
+                portfolio_paths, lump_sum, annuity_due, {"Monthly": 1, "Annually": 12, "Never": 0}[rebalance_choice]
+            )
+            p5, p50, p95 = np.percentile(terminal_values, [5, 50, 95])
+            pm1, pm2, pm3 = st.columns(3)
+            pm1.metric("Pessimistic (P5)", format_currency(p5))
+            pm2.metric("Median (P50)", format_currency(p50))
+            pm3.metric("Optimistic (P95)", format_currency(p95))
+            st.caption(f"Based on {len(asset_returns)} months of joint history from {asset_returns.index[0]:%b %Y}.")
+            st.plotly_chart(terminal_distribution_figure(terminal_values), use_container_width=True)
+
+# --- Retirement Drawdown ---
+with st.expander("🏖️ Retirement Drawdown"):
+    st.caption("Stop contributing after the plan and live off the balance. Simulates 5,000 random return paths through both phases.")
+    rd1, rd2, rd3 = st.columns(3)
+    retirement_years = rd1.slider("Retirement Length (Years)", 5, 50, 30)
+    withdrawal_mode = rd2.radio("Withdrawal", ["Fixed", "Inflation-indexed", "% of balance"], help="Inflation-indexed raises the withdrawal by the Annual Inflation rate each year.")
+    success_target = rd3.slider("Required Success Probability (%)", 50, 99, 90)
+
+    mode_key = {"Fixed": "fixed", "Inflation-indexed": "inflation_indexed", "% of balance": "percent"}[withdrawal_mode]
+    use_history = hist_monthly_returns is not None and len(hist_monthly_returns) > 0
+    if hist_monthly_returns is not None and len(hist_monthly_returns) > 1:
+        drawdown_vol = float(np.std(hist_monthly_returns, ddof=1) * np.sqrt(12) * 100)
+    else:
+        drawdown_vol = 15.0
+    drawdown_args = (
+        df["contribution"].values + df["extra_lump"].values,
+        tuple(hist_monthly_returns) if use_history else None,
+        float(nominal_annual_return_pct), drawdown_vol, projection["drag_monthly"],
+        retirement_years * 12, mode_key, lump_sum, annuity_due, projection["deval_monthly"]
+    )
+    drawdown = build_drawdown_simulation(*drawdown_args)
+    st.caption(f"Returns are {'bootstrapped from ' + ticker + ' history' if use_history else f'log-normal at {drawdown_vol:.1f}% volatility'}. Median balance at retirement: {format_currency(np.median(drawdown.retirement_balances))}.")
+
+    if mode_key == "percent":
+        withdrawal_pct = st.slider("Annual Withdrawal Rate (% of balance)", 1.0, 15.0, 4.0, step=0.5)
+        withdrawal = 1 - (1 - withdrawal_pct / 100) ** (1 / 12)
+        paid = drawdown.withdrawals(withdrawal)
+        wd1, wd2, wd3 = st.columns(3)
+        wd1.metric("Median First-Year Income", format_currency(np.median(paid[:12].sum(axis=0))))
+        wd2.metric("Median Final-Year Income", format_currency(np.median(paid[-12:].sum(axis=0))))
+        wd3.metric("Pessimistic Final-Year Income (P5)", format_currency(np.percentile(paid[-12:].sum(axis=0), 5)))
+    else:
+        safe_withdrawal = solve_withdrawal_cached(success_target / 100, *drawdown_args)
+        withdrawal = st.number_input("Your Planned Monthly Withdrawal", min_value=0.0, value=float(round(safe_withdrawal, -1)), step=100.0)
+        wd1, wd2, wd3 = st.columns(3)
+        wd1.metric(f"Max Withdrawal at {success_target}% Success", f"{format_currency(safe_withdrawal)}/mo")
+        wd2.metric("Success Rate of Your Withdrawal", f"{drawdown.success_rate(withdrawal) * 100:.1f}%")
+        wd3.metric("Initial Withdrawal Rate", f"{safe_withdrawal * 12 / max(np.median(drawdown.retirement_balances), 1) * 100:.2f}%/yr", help="Safe annual withdrawal as a share of the median retirement balance.")
+    st.plotly_chart(drawdown_figure(drawdown.balances(withdrawal)), use_container_width=True)
+
 # --- AI Pitch Generator ---
 st.divider()
 st.subheader("✨ Magical AI Pitch Generator")
 st.markdown("Use our proprietary AI to generate a tailored, professional investment pitch based on the current projections.")
 
-if st.button("Generate Professional Pitch with AI", type="primary"):
+pitch_col, regenerate_col = st.columns([3, 1])
+generate_pitch = pitch_col.button("Generate Professional Pitch with AI", type="primary")
+regenerate_pitch = regenerate_col.button("🔄 Regenerate", help="Skip the saved pitch for these numbers and ask the AI for a fresh one.")
+
+if generate_pitch or regenerate_pitch:
     api_key = None
     load_dotenv()
     api_key = os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")
@@ -282,54 +545,60 @@ if st.button("Generate Professional Pitch with AI", type="primary"):
                 api_key = st.secrets["gemini"]["api_key"]
         except Exception:
             pass
-    if not api_key:
+    if not api_key and not os.environ.get("PITCH_FAKE_CLIENT"):
         st.error("⚠️ AI Engine Configuration Missing: Please set 'GEMINI_API_KEY' in your environment variables or Streamlit secrets (.streamlit/secrets.toml).")
     else:
-        with st.spinner("Our Magical AI is analyzing data and generating your pitch..."):
-            try:
-                genai.configure(api_key=api_key)
-                model = genai.GenerativeModel('gemini-flash-latest')
-                
-                context = f"""
-                You are a highly professional, expert financial advisor creating a pitch for a high-net-worth client.
-                The client is considering an investment plan with the following metrics:
-                - Duration: {years} years
-                - Base Monthly Contribution: {base_monthly_contribution}
-                - Expected Annual Return: {nominal_annual_return_pct}%
-                - Expected Inflation/Devaluation: {annual_devaluation_pct}%
-                - Total Contributed over {years} years: {format_currency(total_contrib)}
-                - Final Projected Value (Nominal): {format_currency(final_nominal)}
-                - Final Projected Value (Purchasing Power Adjusted): {format_currency(final_real)}
-                
-                Write a concise, compelling 3-paragraph executive summary to sell this investment strategy.
-                - Paragraph 1: Highlight the sheer growth and the magic of compounding based on these numbers.
-                - Paragraph 2: Address the inflation/devaluation factor gracefully, showing that even after adjusting for a {annual_devaluation_pct}% drop in purchasing power, the real value still makes it a sound investment.
-                - Paragraph 3: A strong call to action.
-                Use professional formatting (bolding, maybe a bullet or two). Do not use placeholders. Tone should be premium, authoritative, and inspiring.
-                """
-                
-                response = model.generate_content(context)
-                
-                st.info("### 📝 Your Custom Pitch")
-                st.markdown(response.text)
-                
+        try:
+            pitch_client = get_pitch_client(api_key)
+            pitch_cache = get_pitch_cache()
+            context = build_pitch_prompt(
+                years, base_monthly_contribution, nominal_annual_return_pct, annual_devaluation_pct,
+                total_contrib, final_nominal, final_real
+            )
+            pitch_key = pitch_cache_key(context, pitch_client.model_name)
+            pitch_text = None if regenerate_pitch else pitch_cache.get(pitch_key)
+
+            st.info("### 📝 Your Custom Pitch")
+            if pitch_text and pitch_text.strip():
+                st.markdown(pitch_text)
+                st.caption("⚡ Served from the pitch cache for these exact numbers. Use Regenerate for a fresh take.")
+            else:
+                # Render chunks as they arrive instead of waiting for the whole pitch.
+                pitch_stream = TimedStream(pitch_client.stream(context), pitch_client.model_name)
+                st.write_stream(pitch_stream)
+                pitch_text = pitch_stream.text
+                if not pitch_text.strip():
+                    # Nothing came back: don't cache it, and there is no first-chunk time to show.
+                    st.warning("The AI engine returned an empty pitch. Try Regenerate.")
+                else:
+                    pitch_cache.put(pitch_key, pitch_client.model_name, pitch_text)
+                    st.caption(f"⏱️ First token after {pitch_stream.first_chunk_s:.2f}s · complete in {pitch_stream.total_s:.2f}s")
+
+            if pitch_text.strip():
                 st.download_button(
                     label="📥 Download Pitch as TXT",
-                    data=response.text,
+                    data=pitch_text,
                     file_name="investment_pitch.txt",
                     mime="text/plain"
                 )
-            except Exception as e:
-                st.error(f"Error generating AI pitch: {str(e)}")
+        except Exception as e:
+            st.error(f"Error generating AI pitch: {str(e)}")
 
-# Detailed Table Expander
-with st.expander("🔍 View Detailed Monthly Ledger"):
+# Detailed Ledger (built only while switched on, and sent one page at a time)
+if st.toggle("🔍 View Detailed Monthly Ledger"):
+    ledger = monthly_ledger(projection_inputs)
+    if projection_inputs.granularity != "monthly":
+        step_label = {"weekly": "Every week", "daily": "Every day"}[projection_inputs.granularity]
+        ledger_resolution = st.radio("Rows", ["Monthly", step_label], horizontal=True)
+        if ledger_resolution != "Monthly":
+            ledger = step_ledger(projection_inputs)
+    n_pages = max(1, math.ceil(len(ledger) / LEDGER_PAGE_SIZE))
+    ledger_page = st.number_input(f"Page (of {n_pages})", 1, n_pages, 1) if n_pages > 1 else 1
+    first_row = (ledger_page - 1) * LEDGER_PAGE_SIZE
     st.dataframe(
-        df[["date", "contribution", "extra_lump", "nominal_balance", "real_balance"]].style.format({
-            "contribution": "{:,.0f}",
-            "extra_lump": "{:,.0f}",
-            "nominal_balance": "{:,.0f}",
-            "real_balance": "{:,.0f}"
-        }),
+        ledger.iloc[first_row:first_row + LEDGER_PAGE_SIZE],
+        column_config=LEDGER_COLUMN_CONFIG,
+        hide_index=True,
         use_container_width=True
     )
+    st.caption(f"Rows {first_row + 1:,}–{min(first_row + LEDGER_PAGE_SIZE, len(ledger)):,} of {len(ledger):,}")
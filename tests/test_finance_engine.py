@@ -0,0 +1,63 @@
+"""The vectorized finance engine against the original per-month loops it replaced."""
+import numpy as np
+import pytest
+
+from finance_engine import (
+    amortization_schedule, calculate_investment_scenarios, check_amortization_schedule, check_investment_scenario,
+    irr, loan_cash_flows,
+)
+
+HORIZONS = (0, 1, 12, 120, 480, 1200)
+
+
+@pytest.mark.parametrize("months", HORIZONS)
+@pytest.mark.parametrize("investment, rate, deduction, zakat, tax, tax_rate", [
+    (1_000_000, 0.03, 0.0, True, True, 15.0),
+    (1_000_000, 0.03, 5_000.0, True, False, 0.0),
+    (500_000, 0.01, 2_000.0, False, True, 30.0),
+    (100_000, 0.02, 5_000.0, True, True, 15.0),       # deduction binds from month one
+    (100_000, 0.0, 0.0, True, True, 15.0),
+    (2_500_000, 0.015, 37_500.0, True, True, 100.0),
+    (1_000_000, 0.03, 30_000.0, True, True, 15.0),    # deduction equals the first month's profit
+    (1_000_000, 0.05, 50_000.0, True, False, 0.0),
+    (100_000, 0.10, 10_000.0, False, True, 15.0),
+    (1_000_000, 0.03, 29_000.0, True, True, 15.0),    # just below it
+])
+def test_investment_scenario_matches_loop(investment, rate, deduction, zakat, tax, tax_rate, months):
+    check_investment_scenario(investment, rate, deduction, months, zakat, tax, tax_rate)
+
+
+def test_investment_scenario_matches_loop_on_random_plans():
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        investment = rng.uniform(0, 5_000_000)
+        rate = rng.choice([0.0, rng.uniform(0, 0.05)])
+        deduction = rng.choice([0.0, rng.uniform(0, 100_000), investment * rate])
+        check_investment_scenario(investment, rate, deduction, int(rng.integers(0, 1201)),
+                                  bool(rng.integers(2)), bool(rng.integers(2)), rng.uniform(0, 40))
+
+
+def test_scenario_batch_matches_single_scenarios():
+    investments = np.array([1_000_000, 1_000_000, 250_000])
+    rates = np.array([0.03, 0.02, 0.01])
+    deductions = np.array([30_000.0, 0.0, 1_000.0])
+    horizons = np.array([1200, 60, 1200])
+    batch = calculate_investment_scenarios(investments, rates, deductions, horizons, True, True, 15.0)
+    np.testing.assert_allclose(batch["total"][0], 1_000_000)
+    for i, months in enumerate(horizons):
+        check_investment_scenario(investments[i], rates[i], deductions[i], months, True, True, 15.0)
+        assert np.isnan(batch["total"][i, months:]).all()
+
+
+@pytest.mark.parametrize("args", [
+    (5_000_000, 18.0, 5), (5_000_000, 18.0, 30, 50_000.0), (500_000, 0.0, 10, 7_000.0), (0.0, 12.0, 1),
+    (10_000, 18.0, 1), (500_000, 12.0, 5, 7_000.0),
+])
+def test_amortization_schedule_matches_loop(args):
+    check_amortization_schedule(*args)
+
+
+@pytest.mark.parametrize("args", [(5_000_000, 18.0, 30, 50_000.0), (500_000, 12.0, 5, 7_000.0), (10_000, 18.0, 1)])
+def test_loan_apr_without_fees_is_the_quoted_rate(args):
+    schedule = amortization_schedule(*args)
+    assert irr(loan_cash_flows(args[0], schedule["payments"])) * 12 * 100 == pytest.approx(args[1], rel=1e-9)